@@ -14,6 +14,15 @@ Cara penggunaan:
 
 import sys
 import os
+import re
+import json
+import bisect
+import pickle
+import time
+import hashlib
+import heapq
+from collections import OrderedDict, deque
+from itertools import islice, zip_longest
 
 # Tambahkan root directory ke path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -36,24 +45,280 @@ from src.config import (
     load_database_config,
     get_available_databases,
     get_default_database,
+    get_cache_path,
+)
+# src.database / src.parser (pandas, psycopg2, xlsxwriter) di-import lazy
+# saat dibutuhkan, supaya --help / --list / menu pilih database tetap cepat
+
+
+# =============================================================================
+# STATIC SCREENS
+# =============================================================================
+# Teks menu/bantuan dibangun sekali saat import, ditulis dengan 1x sys.stdout.write
+_LINE = "-" * 60
+_DOUBLE_LINE = "=" * 60
+_WIDE_LINE = "-" * 100
+_WIDE_DOUBLE_LINE = "=" * 100
+
+_HELP_TEXT = f"""
+{_DOUBLE_LINE}
+SMART QUERY - BANTUAN
+{_DOUBLE_LINE}
+
+FORMAT QUERY:
+{_LINE}
+
+1. Format 'show':
+   show <kolom1>, <kolom2> where <kondisi>
+   Contoh: show job_number, talent_name where status=completed
+
+2. Format 'primary':
+   primary <kolom_utama> show <kolom2>, <kolom3>
+   Contoh: primary job_number show company, total_fee
+
+3. Format colon ':':
+   <kolom_utama>: <kolom2>, <kolom3> where <kondisi>
+   Contoh: job_number: talent_name, product where status=done
+
+{_LINE}
+KLAUSA TAMBAHAN:
+{_LINE}
+
+  where <kondisi>     - Filter data
+  order by <kolom>    - Urutkan hasil (asc/desc)
+  limit <n>           - Batasi jumlah hasil
+
+Contoh lengkap:
+  show job_number, talent_name where status=completed order by job_number desc limit 100
+
+{_LINE}
+DATE RANGE FILTER:
+{_LINE}
+
+  Format: kolom=tanggal_awal..tanggal_akhir
+  Atau:   kolom=tanggal_awal to tanggal_akhir
+
+  Contoh:
+    show job_number, talent_name where start_date=2025-01-01..2025-12-31
+    show job_number, company where schedule_date=2025-10-01 to 2025-12-29
+
+{_LINE}
+STATUS SHORTCUTS:
+{_LINE}
+
+  completed, done     -> is_completed = true
+  cancelled, canceled -> is_canceled = true
+  paid, transferred   -> is_transferred = true
+  hold, onhold        -> is_hold = true
+  not_completed       -> is_completed = false
+
+{_LINE}
+COMMANDS:
+{_LINE}
+
+  help       - Tampilkan bantuan ini
+  tables     - Daftar semua tabel
+  schema     - Tampilkan schema lengkap
+  cols <key> - Cari kolom (contoh: cols fee)
+  use <db>   - Switch database (contoh: use neo)
+  databases  - Daftar database yang tersedia
+  refresh    - Reload schema (hasil query yang di-cache ikut dibuang)
+  refresh <query>
+             - Jalankan query tanpa result cache (data terbaru)
+  back       - Kembali ke main menu
+
+"""
+
+# Template: format_map dengan db_label, db_key, table_count
+_MAIN_MENU_TEXT = f"""
+{_DOUBLE_LINE}
+DB STUDIO
+{_DOUBLE_LINE}
+Database: {{db_label}} ({{db_key}})
+Tables: {{table_count}} | Mode: READ-ONLY
+{_LINE}
+
+Menu:
+
+  [1] Cek Tabel
+      Lihat daftar tabel, kolom, tipe data, dan relasi
+
+  [2] Generate Query
+      Cari kolom berdasarkan keyword untuk membantu query
+
+  [3] Preview Data
+      Lihat isi data dari tabel dengan limit tertentu
+
+  [4] Smart Query
+      Jalankan query dengan format sederhana:
+      - show job_number, talent_name where status=completed
+      - primary job_number show company, total_fee
+
+{_LINE}
+  [d] Ganti Database    [0] Keluar
+{_LINE}
+"""
+
+# Template: format_map dengan table_count
+_CEK_TABEL_TEXT = f"""
+{_DOUBLE_LINE}
+CEK TABEL
+{_DOUBLE_LINE}
+Total: {{table_count}} tabel tersedia
+{_LINE}
+
+Commands:
+  tables          - Daftar semua tabel dengan jumlah kolom
+  schema          - Tampilkan seluruh schema (kolom & relasi)
+  schema <nama>   - Tampilkan schema tabel tertentu
+  cols <keyword>  - Cari kolom berdasarkan keyword
+  back            - Kembali ke main menu
+
+Contoh:
+  schema job      - Lihat schema tabel yang mengandung 'job'
+  cols fee        - Cari semua kolom yang mengandung 'fee'
+
+"""
+
+_GENERATE_QUERY_TEXT = f"""
+{_DOUBLE_LINE}
+GENERATE QUERY - Pencarian Kolom
+{_DOUBLE_LINE}
+
+Cari kolom berdasarkan keyword untuk membantu membuat query.
+Hasil pencarian menampilkan: tabel.kolom
+
+{_LINE}
+
+Tips untuk Smart Query:
+  - Gunakan hasil pencarian sebagai referensi kolom
+  - Format: show <kolom1>, <kolom2> where <kondisi>
+  - Kolom pertama menentukan tabel utama (primary)
+
+"""
+
+_PREVIEW_DATA_TEXT = f"""
+{_DOUBLE_LINE}
+PREVIEW DATA
+{_DOUBLE_LINE}
+
+Lihat isi data dari tabel. Pilih tabel dengan nomor atau nama.
+Anda dapat mengatur jumlah baris yang ditampilkan (limit).
+
+{_LINE}
+
+Daftar Tabel:
+
+"""
+
+_PREVIEW_DATA_FOOTER = f"""
+{_LINE}
+Ketik nomor/nama tabel, 'list' untuk daftar, 'b' untuk kembali
+
+"""
+
+
+# =============================================================================
+# COLUMN LIBRARY CATEGORIES
+# =============================================================================
+# Urutan = prioritas (kolom yang cocok 'job' dan 'talent' masuk Job)
+_CATEGORY_KEYWORDS = {
+    'job': 'Job',
+    'talent': 'Talent',
+    'company': 'Company',
+    'payment': 'Payment',
+    'product': 'Product',
+    'schedule': 'Schedule',
+}
+_CATEGORY_RE = re.compile('|'.join(_CATEGORY_KEYWORDS))
+
+# Kolom populer untuk sidebar library (jika ada di database)
+_POPULAR_COLUMNS = (
+    'job_number', 'talent_name', 'company_name', 'product_name',
+    'total_fee', 'fee', 'start_date', 'end_date', 'schedule_date',
+    'is_completed', 'is_canceled', 'is_hold', 'payment_number',
+    'team_name', 'campaign_name',
 )
-from src.database import DatabaseManager
-from src.parser import QueryParser
 
 
 class DBStudioCLI:
     """CLI untuk DB Studio"""
 
-    # Query history (shared across instances)
-    query_history = []
     history_index = -1
     MAX_HISTORY = 100
-
-    def __init__(self, db_key=None):
+    MAX_PLAN_CACHE = 128
+    PREVIEW_LIST_PAGE_SIZE = 200  # tabel per halaman daftar Preview Data
+    MAX_RESULT_CACHE = 8
+    RESULT_CACHE_TTL = 60  # detik
+    MAX_SPLIT_VIEW_CACHE = 16
+    MAX_SEARCH_CACHE = 64
+    # Kata pertama yang bisa jadi command Smart Query (selain ini langsung dieksekusi)
+    _COMMAND_HEADS = frozenset((
+        'back', 'b', 'exit', 'quit', 'q', 'help', 'tables', 'schema', 'cols',
+        'lib', 'library', 'databases', 'dbs', 'use', 'history', 'header', 'clear', 'reset',
+        'refresh',
+    ))
+    CATEGORY_PREVIEW = 10
+    SPLIT_LEFT_WIDTH = 58
+    SPLIT_RIGHT_WIDTH = 58
+    SPLIT_TOTAL_WIDTH = SPLIT_LEFT_WIDTH + 3 + SPLIT_RIGHT_WIDTH  # 3 for separator
+    _SPLIT_DOUBLE_LINE = "=" * SPLIT_TOTAL_WIDTH
+    _SPLIT_DIVIDER = "-" * SPLIT_LEFT_WIDTH + "-+-" + "-" * SPLIT_RIGHT_WIDTH
+
+    def __init__(self, db_key=None, refresh_schema=False):
         self.db_key = db_key or get_default_database()
+        self.refresh_schema = refresh_schema
         self.config = None
         self.db = None
         self.parser = None
+        # Query history (bounded, entry terlama otomatis dibuang)
+        self.query_history = deque(maxlen=self.MAX_HISTORY)
+        # File history readline database aktif (hanya diisi di mode interaktif)
+        self._history_file = None
+        # Cache hasil parse + build_sql: normalized query -> (sql, params, applied_filters)
+        self._plan_cache = OrderedDict()
+        # Cache hasil query kecil: (sql, params) -> (timestamp, df) (LRU + TTL)
+        self._result_cache = OrderedDict()
+        # Cache render split view Smart Query: library_search -> string (LRU)
+        self._split_view_cache = OrderedDict()
+        try:
+            self._raw_tty = sys.stdout.isatty()
+        except (AttributeError, ValueError):
+            self._raw_tty = False
+        self._column_library = None
+        self._library_lower = {}  # col_name -> (name_lower, aliases_lower, tables_lower)
+        self._name_index = {}     # n-gram (1-3 karakter) -> set(col_name)
+        self._categories = {}     # kategori -> (jumlah kolom, 10 col_name pertama sorted)
+        self._popular_preview = []  # baris sidebar library (tanpa search), sudah diformat
+        self._search_cache = OrderedDict()  # keyword lowercase -> hasil search (LRU)
+        self._preview_listing = {}  # halaman -> daftar tabel Preview Data (sudah diformat)
+        self._completions = None
+        self._sorted_tables = ()
+        self._tables_lower = ()   # lowercase nama tabel, sejajar _sorted_tables
+        self._table_by_lower = {}  # lowercase nama tabel -> nama asli
+        self._label_columns_cache = {}  # tuple(df.columns) -> {col: label_map}
+        self._db_labels = dict(get_available_databases())
+        # Smart Query: command tanpa argumen -> handler
+        self._commands = {
+            'help': self.show_help,
+            'tables': self.show_tables,
+            'schema': self.show_schema,
+            'databases': self.show_databases,
+            'dbs': self.show_databases,
+            'history': self.show_history,
+            'refresh': self.reload_schema,
+        }
+        # Main menu: pilihan -> submenu
+        self._menu_handlers = {
+            '1': self.menu_cek_tabel,
+            '2': self.menu_generate_query,
+            '3': self.menu_preview_data,
+            '4': self.menu_smart_query,
+        }
+
+    def refresh_db_labels(self):
+        """Reload label database (jika konfigurasi database berubah)"""
+        self._db_labels = dict(get_available_databases())
 
     def add_to_history(self, query):
         """Add query to history"""
@@ -61,8 +326,6 @@ class DBStudioCLI:
             # Avoid duplicates of last query
             if not self.query_history or self.query_history[-1] != query:
                 self.query_history.append(query)
-                if len(self.query_history) > self.MAX_HISTORY:
-                    self.query_history.pop(0)
         self.history_index = len(self.query_history)
 
     def get_history(self, direction):
@@ -80,13 +343,17 @@ class DBStudioCLI:
     def connect(self):
         """Connect ke database"""
         # Get label for display
-        databases = dict(get_available_databases())
-        label = databases.get(self.db_key, self.db_key)
+        label = self._db_labels.get(self.db_key, self.db_key)
 
         print(f"Database: {label} ({self.db_key})")
         self.config = load_database_config(self.db_key)
 
+        from src.database import DatabaseManager
+
         self.db = DatabaseManager(self.config['db_config'])
+        self._sorted_tables = ()
+        self._tables_lower = ()
+        self._table_by_lower = {}
 
         print("Connecting...")
         if not self.db.connect():
@@ -94,7 +361,23 @@ class DBStudioCLI:
             return False
 
         print("Loading schema...")
-        self.db.get_full_schema()
+        self._load_schema(refresh=self.refresh_schema)
+
+        print(f"Connected! ({len(self.db.schema_cache)} tables)\n")
+        return True
+
+    def _load_schema(self, refresh=False):
+        """Load schema (dari disk cache jika masih valid) dan reset state turunannya"""
+        from src.parser import QueryParser
+
+        self.db.get_full_schema(
+            cache_path=get_cache_path(self.db_key, 'schema.pkl'),
+            refresh=refresh
+        )
+        # schema_cache tidak berubah setelah load, sort sekali
+        self._sorted_tables = tuple(sorted(self.db.schema_cache.keys()))
+        self._tables_lower = tuple(t.lower() for t in self._sorted_tables)
+        self._table_by_lower = dict(zip(self._tables_lower, self._sorted_tables))
 
         # Parser dengan auto-generated mappings dari schema
         self.parser = QueryParser(
@@ -102,15 +385,51 @@ class DBStudioCLI:
             self.db.relations_cache,
             self.config  # Contains custom_mappings, status_mappings, status_keywords
         )
-
-        print(f"Connected! ({len(self.db.schema_cache)} tables)\n")
-        return True
+        self._plan_cache.clear()
+        self._result_cache.clear()
+        self._split_view_cache.clear()
+        self._preview_listing.clear()
+        self._completions = None
+        self._label_columns_cache.clear()
+        # Column library di-load lazy saat pertama dipakai (lib / split view)
+        self._column_library = None
+
+    def reload_schema(self):
+        """Introspeksi ulang schema dari database (abaikan disk cache)"""
+        print("Reloading schema...")
+        self._load_schema(refresh=True)
+        print(f"Schema reloaded ({len(self.db.schema_cache)} tables)\n")
 
     def switch_database(self, db_key):
         """Switch ke database lain"""
         self.disconnect()
         self.db_key = db_key
-        return self.connect()
+        connected = self.connect()
+        if self._history_file:
+            self._load_readline_history()
+        return connected
+
+    def _load_readline_history(self):
+        """Load history input readline (per database) dari ~/.dbstudio_cache"""
+        if not READLINE_AVAILABLE:
+            return
+        self._history_file = get_cache_path(self.db_key, 'history')
+        try:
+            readline.clear_history()
+            readline.set_history_length(self.MAX_HISTORY)
+            readline.read_history_file(self._history_file)
+        except (OSError, AttributeError):
+            pass
+
+    def _save_readline_history(self):
+        """Simpan history input readline (gagal tulis diabaikan)"""
+        if not self._history_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._history_file), exist_ok=True)
+            readline.write_history_file(self._history_file)
+        except (OSError, AttributeError):
+            pass
 
     def _transform_boolean_labels(self, df):
         """Transform boolean/integer columns ke readable labels"""
@@ -121,67 +440,177 @@ class DBStudioCLI:
         if not boolean_labels:
             return df
 
-        for col in df.columns:
-            # Get actual column name (bisa ada prefix table)
-            col_name = col.split('.')[-1] if '.' in col else col
-            # Try original name, then with underscore instead of space
-            col_underscore = col_name.replace(' ', '_')
+        from src.database import apply_boolean_labels
+        return apply_boolean_labels(df, self._label_columns(df.columns, boolean_labels))
 
-            label_map = None
-            if col_name in boolean_labels:
-                label_map = boolean_labels[col_name]
-            elif col_underscore in boolean_labels:
-                label_map = boolean_labels[col_underscore]
+    def _label_columns(self, columns, boolean_labels):
+        """
+        Map {kolom_df: label_map} untuk kolom yang punya boolean label.
+        Di-cache per set kolom (mis. tiap chunk export punya kolom yang sama).
+        """
+        key = tuple(columns)
+        col_to_map = self._label_columns_cache.get(key)
+        if col_to_map is None:
+            from src.database import boolean_label_columns
+            col_to_map = boolean_label_columns(columns, boolean_labels)
+            self._label_columns_cache[key] = col_to_map
+        return col_to_map
+
+    def _plan_query(self, query_text):
+        """
+        Parse query dan build SQL, cached per query text (LRU).
+        Key = teks mentah (hanya di-strip): spasi/huruf besar di dalam nilai filter
+        ('a  b' vs 'a b') ikut menentukan hasil, jadi tidak dinormalisasi.
+        """
+        key = query_text.strip()
 
-            if label_map:
-                # Transform values
-                df[col] = df[col].apply(
-                    lambda x, lm=label_map: lm.get(x, lm.get(bool(x) if x is not None else None, x))
-                )
+        plan = self._plan_cache.get(key)
+        if plan is not None:
+            self._plan_cache.move_to_end(key)
+        else:
+            parsed = self.parser.parse(query_text)
+            plan = self.parser.build_sql(parsed)
+            self._plan_cache[key] = plan
+            if len(self._plan_cache) > self.MAX_PLAN_CACHE:
+                self._plan_cache.popitem(last=False)
 
-        return df
+        sql, params, applied_filters = plan
+        return sql, list(params), list(applied_filters)
 
-    def execute_query(self, query_text, export_file=None):
-        """Execute query dan tampilkan hasil"""
+    def _fetch_result(self, sql, params, use_cache=True):
+        """
+        Execute query + label boolean. Hasil <= EXPORT_IN_MEMORY_ROWS di-cache per
+        (sql, params) selama RESULT_CACHE_TTL, jadi query yang diulang tidak ke server lagi.
+        use_cache=False selalu ambil dari server (hasilnya tetap menggantikan entry cache).
+        Return (df, from_cache).
+        """
+        key = (sql, tuple(params))
+        now = time.monotonic()
+        cached = self._result_cache.get(key) if use_cache else None
+        if cached is not None and now - cached[0] < self.RESULT_CACHE_TTL:
+            self._result_cache.move_to_end(key)
+            return cached[1], True
+
+        df = self.db.execute_query(sql, params if params else None)
+        df = self._transform_boolean_labels(df)
+
+        if len(df) <= self.EXPORT_IN_MEMORY_ROWS:
+            self._result_cache[key] = (now, df)
+            self._result_cache.move_to_end(key)
+            if len(self._result_cache) > self.MAX_RESULT_CACHE:
+                self._result_cache.popitem(last=False)
+        else:
+            self._result_cache.pop(key, None)
+        return df, False
+
+    MAX_COLWIDTH = 50
+    PREVIEW_DISPLAY_ROWS = 100  # sisanya di-truncate pandas (head + tail)
+    MAX_PAGE_CACHE = 8
+    EXPORT_IN_MEMORY_ROWS = 10000
+
+    def _render_page(self, df, start_idx, end_idx):
+        """Format 1 halaman hasil (hanya row yang tampil), cell panjang dipotong di MAX_COLWIDTH"""
+        # Renderer format-string manual sengaja tidak dipakai: per halaman hanya ~50 row,
+        # dan to_string menjaga format cell asli (NaN, presisi float per kolom)
+        return df.iloc[start_idx:end_idx].to_string(index=False, max_colwidth=self.MAX_COLWIDTH)
+
+    def _export_streaming(self, sql, params, filename):
+        """
+        Export hasil query ke Excel langsung dari server-side cursor.
+        Return jumlah row yang ditulis.
+        """
+        from src.database import write_xlsx_chunks
+
+        chunks = (
+            self._transform_boolean_labels(chunk)
+            for chunk in self.db.iter_query(sql, params if params else None)
+        )
+        return write_xlsx_chunks(chunks, filename)
+
+    def _export_csv(self, sql, params, filename):
+        """
+        Export hasil query ke CSV. Return jumlah row yang ditulis.
+        Tanpa kolom berlabel: COPY (nilai mentah, tercepat). Jika ada kolom boolean
+        berlabel, stream via server-side cursor supaya isinya sama dengan export Excel.
+        """
+        params = params if params else None
+        boolean_labels = self.config.get('boolean_labels', {})
+        if boolean_labels and self._label_columns(self.db.query_columns(sql, params), boolean_labels):
+            print("\nNote: kolom boolean diberi label, CSV ditulis via streaming (bukan COPY)")
+            total_rows = 0
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                for i, chunk in enumerate(self.db.iter_query(sql, params)):
+                    self._transform_boolean_labels(chunk).to_csv(f, index=False, header=(i == 0))
+                    total_rows += len(chunk)
+            return total_rows
+
+        with open(filename, 'wb') as f:
+            return self.db.copy_query(sql, params, f)
+
+    def execute_query(self, query_text, export_file=None, use_cache=True):
+        """
+        Execute query dan tampilkan hasil.
+        Jika export_file di-set, hasil di-stream langsung ke file.
+        use_cache=False melewati result cache (data terbaru dari server).
+        Return jumlah row (int) untuk semua kasus sukses, None jika error.
+        """
         try:
-            # Parse query
-            parsed = self.parser.parse(query_text)
-            sql, params, applied_filters = self.parser.build_sql(parsed)
+            # Parse query (cached)
+            sql, params, applied_filters = self._plan_query(query_text)
 
-            print("=" * 60)
-            print("SQL Query:")
-            print("-" * 60)
-            print(sql)
-            print("=" * 60)
+            from src.parser import format_sql_display
+            out = [_DOUBLE_LINE, "SQL Query:", _LINE, format_sql_display(sql, params), _DOUBLE_LINE]
 
             # Show applied default filters
             if applied_filters:
-                print(f"\n[Auto-filters: {', '.join(applied_filters)}]")
+                out.append(f"\n[Auto-filters: {', '.join(applied_filters)}]")
+            self._write_lines(out)
 
-            # Execute
-            df = self.db.execute_query(sql, params if params else None)
+            # Export langsung: .csv via COPY, selain itu stream dari server-side cursor ke Excel
+            if export_file:
+                if export_file.lower().endswith('.csv'):
+                    total_rows = self._export_csv(sql, params, export_file)
+                else:
+                    total_rows = self._export_streaming(sql, params, export_file)
+                print(f"\nResult: {total_rows} rows")
+                print(f"Exported to: {export_file}")
+                return total_rows
 
-            # Transform boolean columns ke readable labels
-            df = self._transform_boolean_labels(df)
+            # Execute + transform boolean columns ke readable labels (cached)
+            df, from_cache = self._fetch_result(sql, params, use_cache)
 
-            print(f"\nResult: {len(df)} rows\n")
+            if from_cache:
+                print(f"\nResult: {len(df)} rows (cached, 'refresh <query>' untuk data terbaru)\n")
+            else:
+                print(f"\nResult: {len(df)} rows\n")
 
             if len(df) == 0:
                 print("(No data)")
-                return df
+                return 0
 
-            # Pagination untuk large results
+            # Pagination untuk large results: hanya row di halaman aktif yang di-format
             page_size = 50
             total_rows = len(df)
             total_pages = (total_rows + page_size - 1) // page_size
             current_page = 0
+            # Hasil to_string per halaman (LRU): navigasi bolak-balik tidak format ulang
+            page_cache = OrderedDict()
 
             while True:
                 start_idx = current_page * page_size
                 end_idx = min(start_idx + page_size, total_rows)
 
-                # Display current page
-                print(df.iloc[start_idx:end_idx].to_string(index=False))
+                # Display current page (1 halaman saja tidak perlu di-cache)
+                page_text = page_cache.get(current_page)
+                if page_text is None:
+                    page_text = self._render_page(df, start_idx, end_idx)
+                    if total_pages > 1:
+                        page_cache[current_page] = page_text
+                        if len(page_cache) > self.MAX_PAGE_CACHE:
+                            page_cache.popitem(last=False)
+                else:
+                    page_cache.move_to_end(current_page)
+                print(page_text)
 
                 if total_pages > 1:
                     print(f"\n--- Page {current_page + 1}/{total_pages} (rows {start_idx + 1}-{end_idx} of {total_rows}) ---")
@@ -198,8 +627,13 @@ class DBStudioCLI:
                         elif choice == 'l':
                             current_page = total_pages - 1
                         elif choice == 'e':
-                            filename = f"query_result_{len(df)}_rows.xlsx"
-                            df.to_excel(filename, index=False)
+                            filename = f"query_result_{total_rows}_rows.xlsx"
+                            if total_rows <= self.EXPORT_IN_MEMORY_ROWS:
+                                # Data sudah di memory dan kecil, tulis langsung
+                                from src.database import write_xlsx
+                                write_xlsx(df, filename)
+                            else:
+                                self._export_streaming(sql, params, filename)
                             print(f"Exported to: {filename}")
                         elif choice == 'q' or choice == '':
                             break
@@ -210,12 +644,7 @@ class DBStudioCLI:
                 else:
                     break
 
-            # Export jika diminta
-            if export_file:
-                df.to_excel(export_file, index=False)
-                print(f"\nExported to: {export_file}")
-
-            return df
+            return total_rows
 
         except ValueError as e:
             print(f"\nError: {e}")
@@ -227,181 +656,126 @@ class DBStudioCLI:
 
     def show_help(self):
         """Tampilkan bantuan"""
-        print()
-        print("=" * 60)
-        print("SMART QUERY - BANTUAN")
-        print("=" * 60)
-        print()
-        print("FORMAT QUERY:")
-        print("-" * 60)
-        print()
-        print("1. Format 'show':")
-        print("   show <kolom1>, <kolom2> where <kondisi>")
-        print("   Contoh: show job_number, talent_name where status=completed")
-        print()
-        print("2. Format 'primary':")
-        print("   primary <kolom_utama> show <kolom2>, <kolom3>")
-        print("   Contoh: primary job_number show company, total_fee")
-        print()
-        print("3. Format colon ':':")
-        print("   <kolom_utama>: <kolom2>, <kolom3> where <kondisi>")
-        print("   Contoh: job_number: talent_name, product where status=done")
-        print()
-        print("-" * 60)
-        print("KLAUSA TAMBAHAN:")
-        print("-" * 60)
-        print()
-        print("  where <kondisi>     - Filter data")
-        print("  order by <kolom>    - Urutkan hasil (asc/desc)")
-        print("  limit <n>           - Batasi jumlah hasil")
-        print()
-        print("Contoh lengkap:")
-        print("  show job_number, talent_name where status=completed order by job_number desc limit 100")
-        print()
-        print("-" * 60)
-        print("DATE RANGE FILTER:")
-        print("-" * 60)
-        print()
-        print("  Format: kolom=tanggal_awal..tanggal_akhir")
-        print("  Atau:   kolom=tanggal_awal to tanggal_akhir")
-        print()
-        print("  Contoh:")
-        print("    show job_number, talent_name where start_date=2025-01-01..2025-12-31")
-        print("    show job_number, company where schedule_date=2025-10-01 to 2025-12-29")
-        print()
-        print("-" * 60)
-        print("STATUS SHORTCUTS:")
-        print("-" * 60)
-        print()
-        print("  completed, done     -> is_completed = true")
-        print("  cancelled, canceled -> is_canceled = true")
-        print("  paid, transferred   -> is_transferred = true")
-        print("  hold, onhold        -> is_hold = true")
-        print("  not_completed       -> is_completed = false")
-        print()
-        print("-" * 60)
-        print("COMMANDS:")
-        print("-" * 60)
-        print()
-        print("  help       - Tampilkan bantuan ini")
-        print("  tables     - Daftar semua tabel")
-        print("  schema     - Tampilkan schema lengkap")
-        print("  cols <key> - Cari kolom (contoh: cols fee)")
-        print("  use <db>   - Switch database (contoh: use neo)")
-        print("  databases  - Daftar database yang tersedia")
-        print("  back       - Kembali ke main menu")
-        print()
+        sys.stdout.write(_HELP_TEXT)
 
     def show_databases(self):
         """Tampilkan daftar database"""
-        print("\nAvailable Databases:")
-        print("-" * 40)
-        for key, label in get_available_databases():
+        out = ["", "Available Databases:", "-" * 40]
+        for key, label in self._db_labels.items():
             marker = " (active)" if key == self.db_key else ""
-            print(f"  {key:15} - {label}{marker}")
-        print()
+            out.append(f"  {key:15} - {label}{marker}")
+        out.append("")
+        self._write_lines(out)
 
     def show_tables(self):
         """Tampilkan daftar tabel"""
-        print("\nTables:")
-        print("-" * 40)
-        for i, table in enumerate(sorted(self.db.schema_cache.keys()), 1):
-            count = self.db.get_table_count(table)
-            print(f"  {i:3}. {table} ({count} rows)")
-        print()
+        out = ["", "Tables:", "-" * 40]
+        w = out.append
+        counts = self.db.get_all_table_counts()
+        for i, table in enumerate(self._sorted_tables, 1):
+            count = counts.get(table, -1)
+            if count < 0:
+                # Belum pernah di-ANALYZE, fallback ke COUNT(*)
+                count = self.db.get_table_count(table)
+                w(f"  {i:3}. {table} ({count} rows)")
+            else:
+                w(f"  {i:3}. {table} (~{count} rows)")
+        w("")
+        self._write_lines(out)
 
     def show_schema(self, table_filter=None):
         """Tampilkan schema"""
-        tables = sorted(self.db.schema_cache.keys())
+        tables = self._sorted_tables
 
         if table_filter:
-            tables = [t for t in tables if table_filter.lower() in t.lower()]
+            tables = self._match_tables(table_filter)
 
+        if not tables:
+            return
+
+        # Schema penuh bisa ribuan baris: kumpulkan dulu, tulis sekali
+        out = []
+        w = out.append
         for table in tables:
             info = self.db.schema_cache[table]
-            print(f"\n{table}")
-            print("-" * len(table))
+            w(f"\n{table}")
+            w("-" * len(table))
 
             for col in info['columns']:
-                print(f"  {col['name']:30} {col['type']}")
+                w(f"  {col['name']:30} {col['type']}")
 
             if info.get('relations'):
-                print("  Relations:")
+                w("  Relations:")
                 for rel in info['relations']:
-                    print(f"    {rel['from_column']} -> {rel['to_table']}.{rel['to_column']}")
+                    w(f"    {rel['from_column']} -> {rel['to_table']}.{rel['to_column']}")
+        self._write_lines(out)
+
+    def _match_tables(self, term):
+        """Nama tabel (sorted) yang mengandung term, case-insensitive"""
+        term = term.lower()
+        return [t for t, t_lower in zip(self._sorted_tables, self._tables_lower) if term in t_lower]
+
+    def _resolve_table(self, choice):
+        """Nomor (1-based, urutan _sorted_tables) atau nama tabel case-insensitive -> nama tabel / None"""
+        if choice.isdigit():
+            idx = int(choice) - 1
+            return self._sorted_tables[idx] if 0 <= idx < len(self._sorted_tables) else None
+        return self._table_by_lower.get(choice.lower())
 
     def search_columns(self, search_term):
         """Cari kolom berdasarkan nama"""
-        print(f"\nSearching for: {search_term}")
-        print("-" * 50)
+        out = ["", f"Searching for: {search_term}", "-" * 50]
 
         matches = self.parser.find_all_columns(search_term)
 
         if matches:
-            for m in matches[:20]:  # Max 20 results
-                print(f"  {m['table']}.{m['column']}")
+            out.extend(f"  {m['table']}.{m['column']}" for m in matches[:20])  # Max 20 results
             if len(matches) > 20:
-                print(f"  ... ({len(matches) - 20} more)")
+                out.append(f"  ... ({len(matches) - 20} more)")
         else:
-            print("  No matches found")
-        print()
+            out.append("  No matches found")
+        out.append("")
+        self._write_lines(out)
+
+    def _main_menu_info(self):
+        """Info database untuk template main menu"""
+        return {
+            'db_label': self._db_labels.get(self.db_key, self.db_key),
+            'db_key': self.db_key,
+            'table_count': len(self.db.schema_cache),
+        }
 
     def show_main_menu(self):
         """Tampilkan main menu"""
+        # Database info hanya berubah saat ganti database
+        menu_info = self._main_menu_info()
+        # Menu hanya digambar ulang setelah kembali dari submenu, bukan setelah input salah
+        redraw = True
+        # History input (panah atas) tersimpan antar sesi
+        self._load_readline_history()
+
         while True:
-            # Get database info
-            databases = dict(get_available_databases())
-            db_label = databases.get(self.db_key, self.db_key)
-            table_count = len(self.db.schema_cache)
-
-            print()
-            print("=" * 60)
-            print("DB STUDIO")
-            print("=" * 60)
-            print(f"Database: {db_label} ({self.db_key})")
-            print(f"Tables: {table_count} | Mode: READ-ONLY")
-            print("-" * 60)
-            print()
-            print("Menu:")
-            print()
-            print("  [1] Cek Tabel")
-            print("      Lihat daftar tabel, kolom, tipe data, dan relasi")
-            print()
-            print("  [2] Generate Query")
-            print("      Cari kolom berdasarkan keyword untuk membantu query")
-            print()
-            print("  [3] Preview Data")
-            print("      Lihat isi data dari tabel dengan limit tertentu")
-            print()
-            print("  [4] Smart Query")
-            print("      Jalankan query dengan format sederhana:")
-            print("      - show job_number, talent_name where status=completed")
-            print("      - primary job_number show company, total_fee")
-            print()
-            print("-" * 60)
-            print("  [d] Ganti Database    [0] Keluar")
-            print("-" * 60)
+            if redraw:
+                sys.stdout.write(_MAIN_MENU_TEXT.format_map(menu_info))
+            redraw = True
 
             try:
                 choice = input("Pilih menu [1-4, d, 0]: ").strip().lower()
 
-                if choice == '1':
-                    self.menu_cek_tabel()
-                elif choice == '2':
-                    self.menu_generate_query()
-                elif choice == '3':
-                    self.menu_preview_data()
-                elif choice == '4':
-                    self.menu_smart_query()
+                handler = self._menu_handlers.get(choice)
+                if handler is not None:
+                    handler()
                 elif choice == 'd':
                     new_db = select_database_interactive()
                     if new_db != self.db_key:
                         self.switch_database(new_db)
+                        menu_info = self._main_menu_info()
                 elif choice in ('0', 'exit', 'quit', 'q'):
                     print("\nBye!")
                     break
                 else:
                     print("Pilihan tidak valid.")
+                    redraw = False
 
             except KeyboardInterrupt:
                 print("\n\nBye!")
@@ -412,25 +786,7 @@ class DBStudioCLI:
     def menu_cek_tabel(self):
         """Menu 1: Cek Tabel - Lihat daftar tabel & kolom"""
         table_count = len(self.db.schema_cache)
-
-        print()
-        print("=" * 60)
-        print("CEK TABEL")
-        print("=" * 60)
-        print(f"Total: {table_count} tabel tersedia")
-        print("-" * 60)
-        print()
-        print("Commands:")
-        print("  tables          - Daftar semua tabel dengan jumlah kolom")
-        print("  schema          - Tampilkan seluruh schema (kolom & relasi)")
-        print("  schema <nama>   - Tampilkan schema tabel tertentu")
-        print("  cols <keyword>  - Cari kolom berdasarkan keyword")
-        print("  back            - Kembali ke main menu")
-        print()
-        print("Contoh:")
-        print("  schema job      - Lihat schema tabel yang mengandung 'job'")
-        print("  cols fee        - Cari semua kolom yang mengandung 'fee'")
-        print()
+        sys.stdout.write(_CEK_TABEL_TEXT.format_map({'table_count': table_count}))
 
         while True:
             try:
@@ -457,21 +813,7 @@ class DBStudioCLI:
 
     def menu_generate_query(self):
         """Menu 2: Generate Query - Cari kolom & filter"""
-        print()
-        print("=" * 60)
-        print("GENERATE QUERY - Pencarian Kolom")
-        print("=" * 60)
-        print()
-        print("Cari kolom berdasarkan keyword untuk membantu membuat query.")
-        print("Hasil pencarian menampilkan: tabel.kolom")
-        print()
-        print("-" * 60)
-        print()
-        print("Tips untuk Smart Query:")
-        print("  - Gunakan hasil pencarian sebagai referensi kolom")
-        print("  - Format: show <kolom1>, <kolom2> where <kondisi>")
-        print("  - Kolom pertama menentukan tabel utama (primary)")
-        print()
+        sys.stdout.write(_GENERATE_QUERY_TEXT)
 
         while True:
             try:
@@ -488,37 +830,42 @@ class DBStudioCLI:
                 print()
                 break
 
+    def _get_preview_listing(self, tables, page=0):
+        """
+        Daftar tabel 2 kolom untuk Preview Data, maks PREVIEW_LIST_PAGE_SIZE tabel
+        per halaman (nomor tetap global). Di-format sekali per halaman per schema.
+        """
+        listing = self._preview_listing.get(page)
+        if listing is None:
+            size = self.PREVIEW_LIST_PAGE_SIZE
+            total_pages = max(1, (len(tables) + size - 1) // size)
+            offset = page * size
+            page_tables = tables[offset:offset + size]
+            half = (len(page_tables) + 1) // 2
+            lines = []
+            for i in range(half):
+                left = f"  {offset+i+1:3}. {page_tables[i][:25]:<25}"
+                if i + half < len(page_tables):
+                    right = f"  {offset+i+half+1:3}. {page_tables[i+half]}"
+                else:
+                    right = ""
+                lines.append(f"{left}  {right}")
+            if total_pages > 1:
+                lines.append(f"\n  Halaman {page + 1}/{total_pages} ({len(tables)} tabel)"
+                             f" - ketik 'list <halaman>' untuk halaman lain")
+            listing = "\n".join(lines)
+            self._preview_listing[page] = listing
+        return listing
+
     def menu_preview_data(self):
         """Menu 3: Preview Data - Lihat isi data tabel"""
-        tables = sorted(self.db.schema_cache.keys())
-
-        print()
-        print("=" * 60)
-        print("PREVIEW DATA")
-        print("=" * 60)
-        print()
-        print("Lihat isi data dari tabel. Pilih tabel dengan nomor atau nama.")
-        print("Anda dapat mengatur jumlah baris yang ditampilkan (limit).")
-        print()
-        print("-" * 60)
-        print()
-        print("Daftar Tabel:")
-        print()
+        tables = self._sorted_tables
+        # Tab completion nama tabel (lowercase, sama seperti input yang dicocokkan)
+        self._set_prefix_completer(sorted(self._tables_lower))
 
-        # Tampilkan dalam 2 kolom
-        half = (len(tables) + 1) // 2
-        for i in range(half):
-            left = f"  {i+1:3}. {tables[i][:25]:<25}"
-            if i + half < len(tables):
-                right = f"  {i+half+1:3}. {tables[i+half]}"
-            else:
-                right = ""
-            print(f"{left}  {right}")
-
-        print()
-        print("-" * 60)
-        print("Ketik nomor/nama tabel, 'list' untuk daftar, 'b' untuk kembali")
-        print()
+        sys.stdout.write(_PREVIEW_DATA_TEXT)
+        print(self._get_preview_listing(tables))
+        sys.stdout.write(_PREVIEW_DATA_FOOTER)
 
         while True:
             try:
@@ -528,35 +875,29 @@ class DBStudioCLI:
                     continue
                 elif choice.lower() in ('back', 'b', 'exit', 'q'):
                     break
-                elif choice.lower() == 'list':
-                    # Tampilkan ulang daftar tabel
+                elif choice.lower() == 'list' or choice.lower().startswith('list '):
+                    # Tampilkan ulang daftar tabel (per halaman untuk schema besar)
+                    arg = choice[5:].strip()
+                    total_pages = max(1, (len(tables) + self.PREVIEW_LIST_PAGE_SIZE - 1)
+                                      // self.PREVIEW_LIST_PAGE_SIZE)
+                    if arg and not (arg.isdigit() and 1 <= int(arg) <= total_pages):
+                        print(f"Halaman tidak valid (1-{total_pages}).")
+                        continue
                     print()
-                    for i in range(half):
-                        left = f"  {i+1:3}. {tables[i][:25]:<25}"
-                        if i + half < len(tables):
-                            right = f"  {i+half+1:3}. {tables[i+half]}"
-                        else:
-                            right = ""
-                        print(f"{left}  {right}")
+                    print(self._get_preview_listing(tables, int(arg) - 1 if arg else 0))
                     print()
                     continue
 
-                # Cek apakah input adalah nomor
-                try:
-                    idx = int(choice) - 1
-                    if 0 <= idx < len(tables):
-                        table_name = tables[idx]
-                    else:
-                        print(f"Nomor tidak valid (1-{len(tables)}). Ketik 'list' untuk daftar tabel.")
-                        continue
-                except ValueError:
-                    # Input adalah nama tabel
-                    table_name = choice
+                # Nomor atau nama tabel: 1 index / dict lookup
+                table_name = self._resolve_table(choice)
+                if table_name is None and choice.isdigit():
+                    print(f"Nomor tidak valid (1-{len(tables)}). Ketik 'list' untuk daftar tabel.")
+                    continue
 
                 # Validasi tabel
-                if table_name not in self.db.schema_cache:
+                if table_name is None:
                     # Coba cari tabel yang mirip
-                    matches = [t for t in tables if choice.lower() in t.lower()]
+                    matches = self._match_tables(choice)
                     if matches:
                         print(f"Tabel '{choice}' tidak ditemukan. Mungkin maksud Anda:")
                         for m in matches[:5]:
@@ -580,23 +921,29 @@ class DBStudioCLI:
                     limit = 10
 
                 try:
-                    count = self.db.get_table_count(table_name)
+                    count, is_estimate = self.db.get_table_count_fast(table_name)
                     col_count = len(self.db.schema_cache[table_name]['columns'])
+                    approx = "~" if is_estimate else ""
 
                     print()
                     print(f"Tabel: {table_name}")
-                    print(f"Total: {count:,} rows | Kolom: {col_count} | Showing: {min(limit, count)} rows")
+                    print(f"Total: {approx}{count:,} rows | Kolom: {col_count} | Showing: {min(limit, count)} rows")
                     print("-" * 60)
 
                     df = self.db.preview_table(table_name, limit)
-                    print(df.to_string(index=False))
+                    # Truncate sebelum format: tidak build string untuk semua row x kolom
+                    print(df.to_string(index=False, max_rows=self.PREVIEW_DISPLAY_ROWS,
+                                       max_colwidth=self.MAX_COLWIDTH))
+                    if len(df) > self.PREVIEW_DISPLAY_ROWS:
+                        print(f"({len(df):,} rows, ditampilkan {self.PREVIEW_DISPLAY_ROWS} - export untuk data lengkap)")
 
                     # Export option
                     print()
                     export = input("Export ke Excel? (y/n): ").strip().lower()
                     if export == 'y':
                         filename = f"{table_name}_preview.xlsx"
-                        df.to_excel(filename, index=False)
+                        from src.database import write_xlsx
+                        write_xlsx(df, filename)
                         print(f"Exported to: {filename}")
 
                     print()
@@ -614,25 +961,36 @@ class DBStudioCLI:
         if not READLINE_AVAILABLE:
             return
 
-        # Collect all column names for autocomplete
-        completions = ['show', 'primary', 'where', 'order', 'by', 'limit', 'and',
-                       'help', 'tables', 'schema', 'cols', 'history', 'back', 'lib', 'library']
+        # Sorted completion list dibangun sekali per koneksi (reset di connect)
+        if self._completions is None:
+            # Collect all column names for autocomplete
+            completions = ['show', 'primary', 'where', 'order', 'by', 'limit', 'and',
+                           'help', 'tables', 'schema', 'cols', 'history', 'back', 'lib', 'library']
 
-        # Add column names from mappings
-        if self.parser and hasattr(self.parser, 'column_map'):
-            completions.extend(self.parser.column_map.keys())
+            # Add column names from mappings
+            if self.parser and hasattr(self.parser, 'column_map'):
+                completions.extend(self.parser.column_map.keys())
 
-        # Add table names
-        if self.db and self.db.schema_cache:
-            completions.extend(self.db.schema_cache.keys())
+            # Add table names
+            if self.db and self.db.schema_cache:
+                completions.extend(self.db.schema_cache.keys())
 
-        self._completions = sorted(set(completions))
+            self._completions = sorted(set(completions))
+
+        self._set_prefix_completer(self._completions)
+
+    @staticmethod
+    def _set_prefix_completer(items):
+        """Pasang tab completion readline untuk list sorted (prefix range via bisect, O(log N))"""
+        if not READLINE_AVAILABLE:
+            return
 
         def completer(text, state):
-            """Tab completion function"""
-            options = [c for c in self._completions if c.startswith(text.lower())]
-            if state < len(options):
-                return options[state]
+            prefix = text.lower()
+            lo = bisect.bisect_left(items, prefix)
+            hi = bisect.bisect_right(items, prefix + '\uffff')
+            if lo + state < hi:
+                return items[lo + state]
             return None
 
         readline.set_completer(completer)
@@ -689,59 +1047,182 @@ class DBStudioCLI:
                 if alias not in library[display_name]['aliases'] and alias != display_name:
                     library[display_name]['aliases'].append(alias)
 
-        # Add relation info
+        # Add relation info: 1x per pasangan (table, to_table); display name kolom
+        # tabel tujuan dihitung sekali per tabel, cek duplikat via set
+        seen_pairs = set()
+        seen_relations = set()
+        target_names = {}
         for table_name, table_info in self.db.schema_cache.items():
             for rel in table_info.get('relations', []):
-                from_col = rel['from_column']
                 to_table = rel['to_table']
+                pair = (table_name, to_table)
+                if pair in seen_pairs or to_table not in self.db.schema_cache:
+                    continue
+                seen_pairs.add(pair)
 
                 # Find columns yang bisa di-join via relasi ini
-                if to_table in self.db.schema_cache:
-                    for col in self.db.schema_cache[to_table]['columns']:
-                        if col['name'] == 'name':
-                            display_name = f"{to_table}_name"
-                        else:
-                            display_name = col['name']
+                names = target_names.get(to_table)
+                if names is None:
+                    names = target_names[to_table] = [
+                        f"{to_table}_name" if col['name'] == 'name' else col['name']
+                        for col in self.db.schema_cache[to_table]['columns']
+                    ]
+
+                rel_info = f"{table_name} -> {to_table}"
+                for display_name in names:
+                    if display_name in library and (display_name, rel_info) not in seen_relations:
+                        seen_relations.add((display_name, rel_info))
+                        library[display_name]['relations'].append(rel_info)
+
+        return library
+
+    def _schema_hash(self):
+        """Hash schema + custom mappings, untuk validasi cache column library"""
+        payload = json.dumps(
+            [sorted(self.db.schema_cache.items()), sorted(self.config.get('custom_mappings', {}).items())],
+            default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
 
-                        if display_name in library:
-                            rel_info = f"{table_name} -> {to_table}"
-                            if rel_info not in library[display_name]['relations']:
-                                library[display_name]['relations'].append(rel_info)
+    def _load_column_library(self):
+        """
+        Load column library dari disk cache, rebuild hanya jika schema berubah.
+        Cache disimpan di ~/.dbstudio_cache/<db_key>.library.pkl
+        """
+        schema_hash = self._schema_hash()
+        cache_path = get_cache_path(self.db_key, 'library.pkl')
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_hash, library = pickle.load(f)
+            if cached_hash == schema_hash:
+                return library
+        except Exception:
+            pass
+
+        library = self._build_column_library()
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump((schema_hash, library), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
 
         return library
 
-    def _search_column_library(self, keyword):
-        """Search column library dan return formatted results"""
-        if not hasattr(self, '_column_library'):
-            self._column_library = self._build_column_library()
+    @staticmethod
+    def _trigrams(text):
+        """Semua trigram (3 karakter berurutan) dari text"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
 
+    @staticmethod
+    def _short_grams(text):
+        """Semua unigram dan bigram dari text (untuk keyword < 3 karakter)"""
+        return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def _ensure_column_library(self):
+        """Load + index column library jika belum (single query mode tidak butuh library)"""
+        if self._column_library is None:
+            self._column_library = self._load_column_library()
+            self._index_column_library()
+
+    def _index_column_library(self):
+        """
+        Build inverted n-gram index dari column library.
+        Setiap unigram/bigram/trigram dari nama kolom, alias, dan tabel -> set nama kolom.
+        """
+        self._library_lower = {}
+        self._name_index = {}
+        self._search_cache.clear()
+
+        for col_name, info in self._column_library.items():
+            name_lower = col_name.lower()
+            aliases_lower = [a.lower() for a in info['aliases']]
+            tables_lower = [t.lower() for t in info['tables']]
+            self._library_lower[col_name] = (name_lower, aliases_lower, tables_lower)
+
+            for text in [name_lower] + aliases_lower + tables_lower:
+                for gram in self._trigrams(text) | self._short_grams(text):
+                    self._name_index.setdefault(gram, set()).add(col_name)
+
+        self._categories = self._categorize_column_library()
+        self._popular_preview = [
+            self._library_item_line(col, self._column_library[col]['tables'][0])
+            for col in _POPULAR_COLUMNS if col in self._column_library
+        ]
+
+    def _categorize_column_library(self):
+        """
+        Group kolom library per kategori (berdasarkan nama kolom / tabel).
+        Return {kategori: (jumlah kolom, 10 kolom pertama sorted)} - hanya itu yang ditampilkan.
+        """
+        categories = {name: [] for name in _CATEGORY_KEYWORDS.values()}
+        categories['Other'] = []
+
+        for col_name in self._column_library:
+            col_lower, _, tables_lower = self._library_lower[col_name]
+
+            # 1x regex scan atas nama kolom + semua tabel, lalu ambil keyword prioritas tertinggi
+            haystack = '\x00'.join([col_lower] + tables_lower)
+            found = set(_CATEGORY_RE.findall(haystack))
+            category = next((name for kw, name in _CATEGORY_KEYWORDS.items() if kw in found), 'Other')
+            categories[category].append(col_name)
+
+        return {
+            name: (len(columns), heapq.nsmallest(self.CATEGORY_PREVIEW, columns))
+            for name, columns in categories.items()
+        }
+
+    def _search_column_library(self, keyword):
+        """Search column library dan return formatted results (cached per keyword, LRU)"""
+        self._ensure_column_library()
         keyword_lower = keyword.lower()
+
+        results = self._search_cache.get(keyword_lower)
+        if results is not None:
+            self._search_cache.move_to_end(keyword_lower)
+            return results
+
         results = []
 
-        for col_name, info in self._column_library.items():
+        # Kandidat dari n-gram index: trigram di-intersect, keyword pendek langsung 1 posting
+        if len(keyword_lower) >= 3:
+            postings = [self._name_index.get(tri, set()) for tri in self._trigrams(keyword_lower)]
+            candidates = set.intersection(*postings)
+        elif keyword_lower:
+            candidates = self._name_index.get(keyword_lower, set())
+        else:
+            candidates = self._library_lower.keys()
+
+        for col_name in candidates:
+            info = self._column_library[col_name]
+            name_lower, aliases_lower, tables_lower = self._library_lower[col_name]
+
             # Match by column name
-            if keyword_lower in col_name.lower():
+            if keyword_lower in name_lower:
                 results.append((col_name, info, 'name'))
                 continue
 
             # Match by alias
-            for alias in info['aliases']:
-                if keyword_lower in alias.lower():
+            for alias, alias_lower in zip(info['aliases'], aliases_lower):
+                if keyword_lower in alias_lower:
                     results.append((col_name, info, f'alias:{alias}'))
                     break
 
             # Match by table name
-            for table in info['tables']:
-                if keyword_lower in table.lower():
+            for table, table_lower in zip(info['tables'], tables_lower):
+                if keyword_lower in table_lower:
                     results.append((col_name, info, f'table:{table}'))
                     break
 
         # Sort by relevance: exact match first, then name match, then others
         def sort_key(item):
             col_name, info, match_type = item
-            if col_name.lower() == keyword_lower:
+            name_lower = self._library_lower[col_name][0]
+            if name_lower == keyword_lower:
                 return (0, col_name)
-            elif col_name.lower().startswith(keyword_lower):
+            elif name_lower.startswith(keyword_lower):
                 return (1, col_name)
             elif match_type == 'name':
                 return (2, col_name)
@@ -749,29 +1230,42 @@ class DBStudioCLI:
                 return (3, col_name)
 
         results.sort(key=sort_key)
+
+        self._search_cache[keyword_lower] = results
+        if len(self._search_cache) > self.MAX_SEARCH_CACHE:
+            self._search_cache.popitem(last=False)
         return results
 
+    @staticmethod
+    def _write_lines(lines):
+        """Tulis banyak baris sekaligus (1 write + flush, bukan 1 print per baris)"""
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+
     def show_column_library(self, search_term=None):
         """Show column library dengan optional search"""
-        print()
-        print("=" * 100)
-        print("COLUMN LIBRARY - Perpustakaan Kolom")
-        print("=" * 100)
+        self._ensure_column_library()
+        out = []
+        out.append('')
+        out.append(_WIDE_DOUBLE_LINE)
+        out.append("COLUMN LIBRARY - Perpustakaan Kolom")
+        out.append(_WIDE_DOUBLE_LINE)
 
         if search_term:
             results = self._search_column_library(search_term)
             if not results:
-                print(f"\nTidak ada kolom yang cocok dengan '{search_term}'")
-                print("Tips: Coba keyword yang lebih umum seperti 'job', 'talent', 'fee', 'date'")
+                out.append(f"\nTidak ada kolom yang cocok dengan '{search_term}'")
+                out.append("Tips: Coba keyword yang lebih umum seperti 'job', 'talent', 'fee', 'date'")
+                self._write_lines(out)
                 return
 
-            print(f"\nHasil pencarian untuk '{search_term}': {len(results)} kolom ditemukan")
-            print("-" * 100)
-            print()
+            out.append(f"\nHasil pencarian untuk '{search_term}': {len(results)} kolom ditemukan")
+            out.append(_WIDE_LINE)
+            out.append('')
 
             # Format: Column Name | Tables | Type | Aliases | How to use
-            print(f"{'COLUMN NAME':<30} {'TABLE(S)':<25} {'TYPE':<15} {'ALIASES':<20}")
-            print("-" * 100)
+            out.append(f"{'COLUMN NAME':<30} {'TABLE(S)':<25} {'TYPE':<15} {'ALIASES':<20}")
+            out.append(_WIDE_LINE)
 
             for col_name, info, match_type in results[:30]:  # Max 30 results
                 tables_str = ', '.join(info['tables'][:2])
@@ -784,140 +1278,133 @@ class DBStudioCLI:
 
                 type_str = info['type'][:12] if info['type'] else 'unknown'
 
-                print(f"{col_name:<30} {tables_str:<25} {type_str:<15} {aliases_str:<20}")
+                out.append(f"{col_name:<30} {tables_str:<25} {type_str:<15} {aliases_str:<20}")
 
             if len(results) > 30:
-                print(f"\n... dan {len(results) - 30} kolom lainnya")
+                out.append(f"\n... dan {len(results) - 30} kolom lainnya")
 
             # Show usage tips
-            print()
-            print("-" * 100)
-            print("CARA PENGGUNAAN:")
-            print("-" * 100)
+            out.append('')
+            out.append(_WIDE_LINE)
+            out.append("CARA PENGGUNAAN:")
+            out.append(_WIDE_LINE)
 
             # Pick first result as example
             if results:
                 example_col, example_info, _ = results[0]
                 example_table = example_info['tables'][0] if example_info['tables'] else 'table'
 
-                print(f"  Kolom '{example_col}' ada di tabel: {', '.join(example_info['tables'])}")
+                out.append(f"  Kolom '{example_col}' ada di tabel: {', '.join(example_info['tables'])}")
                 if example_info['aliases']:
-                    print(f"  Alias yang bisa digunakan: {', '.join(example_info['aliases'])}")
-                print()
-                print(f"  Contoh query:")
-                print(f"    show {example_col} where ...")
-                print(f"    show job_number, {example_col} where status=completed")
+                    out.append(f"  Alias yang bisa digunakan: {', '.join(example_info['aliases'])}")
+                out.append('')
+                out.append(f"  Contoh query:")
+                out.append(f"    show {example_col} where ...")
+                out.append(f"    show job_number, {example_col} where status=completed")
 
         else:
-            # Show categories/groups
-            if not hasattr(self, '_column_library'):
-                self._column_library = self._build_column_library()
-
-            # Group columns by category (based on prefix or table)
-            categories = {
-                'Job': [],
-                'Talent': [],
-                'Company': [],
-                'Payment': [],
-                'Product': [],
-                'Schedule': [],
-                'Other': []
-            }
-
-            for col_name, info in self._column_library.items():
-                col_lower = col_name.lower()
-                tables_lower = [t.lower() for t in info['tables']]
-
-                if 'job' in col_lower or any('job' in t for t in tables_lower):
-                    categories['Job'].append(col_name)
-                elif 'talent' in col_lower or any('talent' in t for t in tables_lower):
-                    categories['Talent'].append(col_name)
-                elif 'company' in col_lower or any('company' in t for t in tables_lower):
-                    categories['Company'].append(col_name)
-                elif 'payment' in col_lower or any('payment' in t for t in tables_lower):
-                    categories['Payment'].append(col_name)
-                elif 'product' in col_lower or any('product' in t for t in tables_lower):
-                    categories['Product'].append(col_name)
-                elif 'schedule' in col_lower or any('schedule' in t for t in tables_lower):
-                    categories['Schedule'].append(col_name)
-                else:
-                    categories['Other'].append(col_name)
-
-            print()
-            print("Ketik 'lib <keyword>' untuk mencari kolom. Contoh: lib job, lib fee, lib talent")
-            print()
-            print("-" * 100)
-            print("KATEGORI KOLOM:")
-            print("-" * 100)
-
-            for category, columns in categories.items():
-                if columns:
-                    # Sort and limit display
-                    columns_sorted = sorted(columns)[:10]
-                    columns_str = ', '.join(columns_sorted)
-                    if len(columns) > 10:
-                        columns_str += f' ... (+{len(columns)-10} more)'
-
-                    print(f"\n  [{category}] ({len(columns)} kolom)")
-                    print(f"    {columns_str}")
-
-            print()
-            print("-" * 100)
-            print("TIPS:")
-            print("  - Ketik 'lib job' untuk melihat semua kolom terkait job")
-            print("  - Ketik 'lib fee' untuk melihat kolom fee/payment")
-            print("  - Ketik 'lib name' untuk melihat kolom nama (talent, company, etc)")
-            print("  - Gunakan nama kolom langsung di query, misal: show job_number, talent_name")
-            print()
+            out.append('')
+            out.append("Ketik 'lib <keyword>' untuk mencari kolom. Contoh: lib job, lib fee, lib talent")
+            out.append('')
+            out.append(_WIDE_LINE)
+            out.append("KATEGORI KOLOM:")
+            out.append(_WIDE_LINE)
+
+            # Kategori sudah di-build + sort sekali saat index library
+            for category, (count, top_columns) in self._categories.items():
+                if count:
+                    columns_str = ', '.join(top_columns)
+                    if count > self.CATEGORY_PREVIEW:
+                        columns_str += f' ... (+{count - self.CATEGORY_PREVIEW} more)'
+
+                    out.append(f"\n  [{category}] ({count} kolom)")
+                    out.append(f"    {columns_str}")
+
+            out.append('')
+            out.append(_WIDE_LINE)
+            out.append("TIPS:")
+            out.append("  - Ketik 'lib job' untuk melihat semua kolom terkait job")
+            out.append("  - Ketik 'lib fee' untuk melihat kolom fee/payment")
+            out.append("  - Ketik 'lib name' untuk melihat kolom nama (talent, company, etc)")
+            out.append("  - Gunakan nama kolom langsung di query, misal: show job_number, talent_name")
+            out.append('')
+
+        self._write_lines(out)
+
+    @classmethod
+    def _library_item_line(cls, col_name, table):
+        """Format 1 baris sidebar library: '  column_name (table)', dipotong ke lebar panel"""
+        display = f"  {col_name} ({table})" if table else f"  {col_name}"
+        if len(display) > cls.SPLIT_RIGHT_WIDTH - 2:
+            display = display[:cls.SPLIT_RIGHT_WIDTH - 5] + "..."
+        return display
 
     def _get_library_preview(self, search_term=None, max_items=15):
-        """Get library items untuk preview di sidebar"""
-        if not hasattr(self, '_column_library'):
-            self._column_library = self._build_column_library()
-
+        """Get baris library (sudah diformat) untuk preview di sidebar"""
+        self._ensure_column_library()
         if search_term:
             results = self._search_column_library(search_term)
-            items = []
-            for col_name, info, _ in results[:max_items]:
-                table = info['tables'][0] if info['tables'] else ''
-                items.append((col_name, table))
+            items = [
+                self._library_item_line(col_name, info['tables'][0] if info['tables'] else '')
+                for col_name, info, _ in results[:max_items]
+            ]
             return items, len(results)
         else:
-            # Show popular/common columns
-            popular = [
-                'job_number', 'talent_name', 'company_name', 'product_name',
-                'total_fee', 'fee', 'start_date', 'end_date', 'schedule_date',
-                'is_completed', 'is_canceled', 'is_hold', 'payment_number',
-                'team_name', 'campaign_name'
-            ]
-            items = []
-            for col in popular:
-                if col in self._column_library:
-                    table = self._column_library[col]['tables'][0]
-                    items.append((col, table))
-            return items[:max_items], len(self._column_library)
+            # Show popular/common columns (di-resolve sekali saat index library)
+            return self._popular_preview[:max_items], len(self._column_library)
 
     def show_smart_query_split_view(self, library_search=None):
         """Show Smart Query dengan split view - Query kiri, Library kanan"""
+        # Redraw (clear/header/reset/lib) pakai render yang di-cache jika ada
+        text = self._split_view_cache.get(library_search)
+        if text is not None:
+            self._split_view_cache.move_to_end(library_search)
+        else:
+            text = self._render_split_view(library_search)
+            self._split_view_cache[library_search] = text
+            if len(self._split_view_cache) > self.MAX_SPLIT_VIEW_CACHE:
+                self._split_view_cache.popitem(last=False)
+
+        self._write_frame(text)
+
+    def _write_frame(self, text):
+        """
+        Tulis 1 layar penuh ke terminal.
+        Di TTY langsung os.write ke fd (skip layer TextIOWrapper), selain itu sys.stdout.
+        """
+        if not self._raw_tty:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+
+        sys.stdout.flush()  # output sebelumnya harus keluar duluan
+        data = text.encode(sys.stdout.encoding or 'utf-8', 'replace')
+        fd = sys.stdout.fileno()
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    def _render_split_view(self, library_search=None):
+        """Render split view Smart Query ke string"""
         # Get database info
-        databases = dict(get_available_databases())
-        db_label = databases.get(self.db_key, self.db_key)
+        db_label = self._db_labels.get(self.db_key, self.db_key)
         table_count = len(self.db.schema_cache)
-        total_columns = sum(len(t['columns']) for t in self.db.schema_cache.values())
+        total_columns = self.db.total_column_count
 
         # Get library items
         lib_items, lib_total = self._get_library_preview(library_search, max_items=18)
 
         # Layout dimensions
-        left_width = 58
-        right_width = 58
-        total_width = left_width + 3 + right_width  # 3 for separator
+        left_width = self.SPLIT_LEFT_WIDTH
+        right_width = self.SPLIT_RIGHT_WIDTH
+        total_width = self.SPLIT_TOTAL_WIDTH
 
-        print()
-        print("=" * total_width)
-        print(f"{'SMART QUERY':^{total_width}}")
-        print(f"Database: {db_label} ({self.db_key}) | Tables: {table_count} | Columns: {total_columns}".center(total_width))
-        print("=" * total_width)
+        out = []
+        out.append('')
+        out.append(self._SPLIT_DOUBLE_LINE)
+        out.append(f"{'SMART QUERY':^{total_width}}")
+        out.append(f"Database: {db_label} ({self.db_key}) | Tables: {table_count} | Columns: {total_columns}".center(total_width))
+        out.append(self._SPLIT_DOUBLE_LINE)
 
         # Split header
         left_header = "QUERY PANEL"
@@ -925,8 +1412,8 @@ class DBStudioCLI:
         if library_search:
             right_header = f"LIBRARY: '{library_search}' ({len(lib_items)} hasil)"
 
-        print(f"{left_header:^{left_width}} | {right_header:^{right_width}}")
-        print("-" * left_width + "-+-" + "-" * right_width)
+        out.append(f"{left_header:^{left_width}} | {right_header:^{right_width}}")
+        out.append(self._SPLIT_DIVIDER)
 
         # Content rows - Query format on left, Library on right
         left_lines = [
@@ -959,14 +1446,7 @@ class DBStudioCLI:
             right_lines.append("Kolom populer (ketik 'lib <keyword>'):")
             right_lines.append("")
 
-        for col_name, table in lib_items:
-            # Format: column_name (table)
-            display = f"  {col_name}"
-            if table:
-                display += f" ({table})"
-            if len(display) > right_width - 2:
-                display = display[:right_width - 5] + "..."
-            right_lines.append(display)
+        right_lines.extend(lib_items)
 
         if len(lib_items) < lib_total:
             right_lines.append("")
@@ -974,27 +1454,33 @@ class DBStudioCLI:
             right_lines.append("")
             right_lines.append("Ketik: lib job, lib fee, lib name")
 
-        # Pad lines to same length
-        max_lines = max(len(left_lines), len(right_lines))
-        while len(left_lines) < max_lines:
-            left_lines.append("")
-        while len(right_lines) < max_lines:
-            right_lines.append("")
-
-        # Print side by side
-        for left, right in zip(left_lines, right_lines):
-            print(f"{left:<{left_width}} | {right:<{right_width}}")
+        # Side by side, sisi yang lebih pendek di-pad baris kosong
+        for left, right in zip_longest(left_lines, right_lines, fillvalue=''):
+            out.append(left.ljust(left_width) + ' | ' + right.ljust(right_width))
 
-        print("-" * left_width + "-+-" + "-" * right_width)
+        out.append(self._SPLIT_DIVIDER)
 
         # Footer
         if READLINE_AVAILABLE:
             footer = "[Tab] Autocomplete | Ketik query atau command"
         else:
             footer = "Ketik query atau command"
-        print(f"{footer:^{total_width}}")
-        print("=" * total_width)
-        print()
+        out.append(f"{footer:^{total_width}}")
+        out.append(self._SPLIT_DOUBLE_LINE)
+        out.append('')
+        return '\n'.join(out) + '\n'
+
+    def show_history(self):
+        """Tampilkan 20 query terakhir"""
+        if self.query_history:
+            out = ["", "Query History:", "-" * 80]
+            recent = islice(self.query_history, max(0, len(self.query_history) - 20), None)
+            for i, q in enumerate(recent, 1):
+                out.append(f"  {i:2}. {q[:70]}{'...' if len(q) > 70 else ''}")
+            out.append("")
+            self._write_lines(out)
+        else:
+            print("No query history yet")
 
     def show_smart_query_header(self):
         """Show enhanced Smart Query header dengan info singkat"""
@@ -1006,9 +1492,6 @@ class DBStudioCLI:
         # Setup autocomplete
         self._setup_autocomplete()
 
-        # Build column library on first load
-        self._column_library = self._build_column_library()
-
         # Track current library search for split view
         current_lib_search = None
 
@@ -1022,60 +1505,54 @@ class DBStudioCLI:
                 if not query:
                     continue
 
-                cmd = query.lower()
+                # Cek kata pertama saja; query biasa (show ...) tidak perlu lower() seluruhnya
+                space = query.find(' ')
+                head = (query[:space] if space > 0 else query).lower()
+                cmd = query.lower() if head in self._COMMAND_HEADS else None
 
                 if cmd in ('back', 'b', 'exit', 'quit', 'q'):
                     break
-                elif cmd == 'help':
-                    self.show_help()
-                elif cmd == 'tables':
-                    self.show_tables()
-                elif cmd == 'schema':
-                    self.show_schema()
-                elif cmd.startswith('schema '):
-                    self.show_schema(query[7:].strip())
-                elif cmd.startswith('cols '):
-                    self.search_columns(query[5:].strip())
-                elif cmd == 'lib' or cmd == 'library':
+
+                # Command tanpa argumen: 1 dict lookup
+                handler = self._commands.get(cmd) if cmd is not None else None
+                if handler is not None:
+                    handler()
+                elif cmd is None:
+                    # Add to history dan execute
+                    self.add_to_history(query)
+                    self.execute_query(query)
+                elif cmd in ('lib', 'library', 'reset'):
                     # Reset library search dan show full split view
                     current_lib_search = None
                     self.show_smart_query_split_view(current_lib_search)
-                elif cmd.startswith('lib ') or cmd.startswith('library '):
-                    # Search column library dan refresh split view
-                    current_lib_search = query.split(' ', 1)[1].strip()
-                    self.show_smart_query_split_view(current_lib_search)
-                elif cmd == 'databases' or cmd == 'dbs':
-                    self.show_databases()
-                elif cmd.startswith('use '):
-                    new_db = query[4:].strip()
-                    available = dict(get_available_databases())
-                    if new_db in available:
-                        print()
-                        self.switch_database(new_db)
-                        # Rebuild column library for new database
-                        self._column_library = self._build_column_library()
-                        current_lib_search = None
-                        self.show_smart_query_split_view(current_lib_search)
-                    else:
-                        print(f"Database '{new_db}' tidak ditemukan.")
-                        self.show_databases()
-                elif cmd == 'history':
-                    # Show query history
-                    if self.query_history:
-                        print("\nQuery History:")
-                        print("-" * 80)
-                        for i, q in enumerate(self.query_history[-20:], 1):
-                            print(f"  {i:2}. {q[:70]}{'...' if len(q) > 70 else ''}")
-                        print()
-                    else:
-                        print("No query history yet")
-                elif cmd == 'header' or cmd == 'clear':
+                elif cmd in ('header', 'clear'):
                     # Refresh split view dengan current search
                     self.show_smart_query_split_view(current_lib_search)
-                elif cmd == 'reset':
-                    # Reset library search
-                    current_lib_search = None
-                    self.show_smart_query_split_view(current_lib_search)
+                elif cmd.startswith(('schema ', 'cols ', 'lib ', 'library ', 'use ', 'refresh ')):
+                    arg = query[space + 1:].strip()
+
+                    if head == 'schema':
+                        self.show_schema(arg)
+                    elif head == 'cols':
+                        self.search_columns(arg)
+                    elif head == 'refresh':
+                        # Jalankan ulang query tanpa result cache
+                        self.add_to_history(arg)
+                        self.execute_query(arg, use_cache=False)
+                    elif head == 'use':
+                        if arg in self._db_labels:
+                            print()
+                            self.switch_database(arg)
+                            self._setup_autocomplete()
+                            current_lib_search = None
+                            self.show_smart_query_split_view(current_lib_search)
+                        else:
+                            print(f"Database '{arg}' tidak ditemukan.")
+                            self.show_databases()
+                    else:
+                        # Search column library dan refresh split view
+                        current_lib_search = arg
+                        self.show_smart_query_split_view(current_lib_search)
                 else:
                     # Add to history dan execute
                     self.add_to_history(query)
@@ -1093,13 +1570,15 @@ class DBStudioCLI:
 
     def disconnect(self):
         """Disconnect dari database"""
+        self._save_readline_history()
         if self.db:
             self.db.disconnect()
 
 
 def select_database_interactive():
     """Pilih database secara interaktif"""
-    databases = get_available_databases()
+    # Materialize sekali: dipakai untuk tampilan, len, index, dan pencarian nama
+    databases = tuple(get_available_databases())
     default = get_default_database()
 
     print()
@@ -1126,9 +1605,8 @@ def select_database_interactive():
             return databases[idx][0]
     except ValueError:
         # Mungkin user ketik nama langsung
-        for key, _ in databases:
-            if key == choice:
-                return key
+        if choice in dict(databases):
+            return choice
 
     print(f"Pilihan tidak valid, menggunakan default: {default}")
     return default
@@ -1144,16 +1622,19 @@ Examples:
   python cli.py "show job_number"           # Execute query langsung
   python cli.py -d neo "show job_number"    # Gunakan database 'neo'
   python cli.py -e out.xlsx "show ..."      # Export ke Excel
+  python cli.py -e out.csv "show ..."       # Export CSV (COPY jika tanpa label boolean)
   python cli.py --list                      # List database yang tersedia
   python cli.py --select                    # Pilih database interaktif
+  python cli.py --refresh-schema            # Abaikan schema cache di disk
         """
     )
 
     parser.add_argument('query', nargs='?', help='Query to execute')
     parser.add_argument('-d', '--database', help='Database key to use')
-    parser.add_argument('-e', '--export', help='Export result to Excel file')
+    parser.add_argument('-e', '--export', help='Export result to Excel file (.csv: CSV, via COPY if no boolean labels)')
     parser.add_argument('--list', action='store_true', help='List available databases')
     parser.add_argument('--select', action='store_true', help='Select database interactively')
+    parser.add_argument('--refresh-schema', action='store_true', help='Reload schema from database, ignoring disk cache')
 
     args = parser.parse_args()
 
@@ -1176,7 +1657,7 @@ Examples:
         db_key = select_database_interactive()
 
     # Create CLI instance
-    cli = DBStudioCLI(db_key=db_key)
+    cli = DBStudioCLI(db_key=db_key, refresh_schema=args.refresh_schema)
 
     try:
         if not cli.connect():
@@ -6,15 +6,87 @@ READ-ONLY Mode - only performs SELECT operations.
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
+from datetime import datetime
 
 from src.config import (
     COLORS,
-    load_database_config, get_available_databases, get_default_database
+    load_database_config, get_available_databases, get_default_database,
+    get_cache_path
 )
-from src.database import DatabaseManager
-from src.parser import QueryParser
+from src.database import DatabaseManager, apply_boolean_labels, boolean_label_columns
+from src.parser import QueryParser, column_ref, format_sql_display
+
+
+# Builder WHERE per tipe filter Generate Query: (col_ref, filter) -> (fragment, params)
+def _boolean_filter_clause(col_ref, flt):
+    return f"{col_ref} = %s", [flt['value']]
+
+
+def _date_filter_clause(col_ref, flt):
+    # Date filter - cast to date for proper comparison
+    op = flt.get('op', '>=')
+    if op == 'BETWEEN' and flt.get('value_to'):
+        # Date range
+        return f"{col_ref}::date BETWEEN %s::date AND %s::date", [flt['value'], flt['value_to']]
+    if op == '=':
+        # Single date (exact match)
+        return f"{col_ref}::date = %s::date", [flt['value']]
+    # >= date
+    return f"{col_ref}::date >= %s::date", [flt['value']]
+
+
+def _numeric_filter_clause(col_ref, flt):
+    return f"{col_ref} {flt.get('op', '=')} %s", [flt['value']]
+
+
+def _string_filter_clause(col_ref, flt):
+    val = flt['value']
+    op = flt.get('op', 'LIKE')
+    if op == 'LIKE':
+        # Add wildcards if not present
+        return f"{col_ref} ILIKE %s", [val if '%' in val else f'%{val}%']
+    return f"{col_ref} {op} %s", [val]
+
+
+FILTER_CLAUSE_BUILDERS = {
+    'boolean': _boolean_filter_clause,
+    'date': _date_filter_clause,
+    'numeric': _numeric_filter_clause,
+}
+
+
+# Teks ringkasan filter per tipe (hanya tampilan): filter -> "op value"
+def _boolean_filter_summary(flt):
+    return f"= {'true' if flt['value'] else 'false'}"
+
+
+def _date_filter_summary(flt):
+    op = flt.get('op', '>=')
+    if op == 'BETWEEN' and flt.get('value_to'):
+        return f"BETWEEN '{flt['value']}' AND '{flt['value_to']}'"
+    if op == '=':
+        return f"= '{flt['value']}'"
+    return f">= '{flt['value']}'"
+
+
+def _numeric_filter_summary(flt):
+    return f"{flt.get('op', '=')} {flt['value']}"
+
+
+def _string_filter_summary(flt):
+    op = flt.get('op', 'LIKE')
+    if op == 'LIKE':
+        return f"LIKE '%{flt['value']}%'"
+    return f"{op} '{flt['value']}'"
+
+
+FILTER_SUMMARY_BUILDERS = {
+    'boolean': _boolean_filter_summary,
+    'date': _date_filter_summary,
+    'numeric': _numeric_filter_summary,
+}
 
 
 class AnQueryApp:
@@ -199,7 +271,7 @@ class AnQueryApp:
                     # Update status: Loading schema
                     self.root.after(0, lambda: self._update_status("Loading schema...", connected=False, loading=True))
 
-                    self.db.get_full_schema()
+                    self.db.get_full_schema(get_cache_path(self.current_db_key, 'schema.pkl'))
 
                     # Update status: Initializing parser
                     self.root.after(0, lambda: self._update_status("Initializing...", connected=False, loading=True))
@@ -226,7 +298,8 @@ class AnQueryApp:
         def reconnect_thread():
             try:
                 if self.db.reconnect():
-                    self.db.get_full_schema()
+                    # Reconnect manual: paksa introspeksi ulang (schema mungkin berubah)
+                    self.db.get_full_schema(get_cache_path(self.current_db_key, 'schema.pkl'), refresh=True)
                     self.parser = QueryParser(
                         self.db.schema_cache,
                         self.db.relations_cache,
@@ -296,12 +369,14 @@ class AnQueryApp:
         if not self.db.is_alive():
             self._update_status("Reconnecting...", connected=False, loading=True)
             if self.db.reconnect():
-                self.db.get_full_schema()
-                self.parser = QueryParser(
-                    self.db.schema_cache,
-                    self.db.relations_cache,
-                    self.config
-                )
+                self.db.get_full_schema(get_cache_path(self.current_db_key, 'schema.pkl'))
+                # Schema tidak berubah -> parser (dan index-nya) tetap dipakai
+                if self.parser is None or self.parser.schema_cache is not self.db.schema_cache:
+                    self.parser = QueryParser(
+                        self.db.schema_cache,
+                        self.db.relations_cache,
+                        self.config
+                    )
                 self._update_status("Reconnected", connected=True)
                 return True
             else:
@@ -340,6 +415,20 @@ class AnQueryApp:
 
         raise last_error if last_error else Exception("Unknown error")
 
+    def _export_to_excel(self, df):
+        """Pilih file via dialog lalu export DataFrame ke Excel"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = filedialog.asksaveasfilename(
+            defaultextension='.xlsx',
+            filetypes=[('Excel files', '*.xlsx')],
+            initialfile=f'export_{timestamp}.xlsx'
+        )
+        if not filename:
+            return None
+        self.db.export_to_excel(df, filename)
+        messagebox.showinfo("Success", f"Data exported ke:\n{filename}")
+        return filename
+
     # =========================================================================
     # MENU 1: Cek Tabel
     # =========================================================================
@@ -389,18 +478,20 @@ class AnQueryApp:
         table_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        tables = list(self.db.schema_cache.keys())
-        for table in tables:
-            col_count = len(self.db.schema_cache[table]['columns'])
-            table_listbox.insert(tk.END, f"{table} ({col_count})")
+        # Label + lowercase nama tabel di-build sekali, filter hanya substring check
+        table_items = [
+            (table.lower(), f"{table} ({len(info['columns'])})")
+            for table, info in self.db.schema_cache.items()
+        ]
+        if table_items:
+            table_listbox.insert(tk.END, *(label for _, label in table_items))
 
         def filter_tables(*args):
             search = search_var.get().lower()
             table_listbox.delete(0, tk.END)
-            for table in tables:
-                if search in table.lower():
-                    col_count = len(self.db.schema_cache[table]['columns'])
-                    table_listbox.insert(tk.END, f"{table} ({col_count})")
+            labels = [label for table_lower, label in table_items if search in table_lower]
+            if labels:
+                table_listbox.insert(tk.END, *labels)
 
         search_var.trace('w', filter_tables)
 
@@ -425,19 +516,18 @@ class AnQueryApp:
                 columns_text.configure(state='normal')
                 columns_text.delete('1.0', tk.END)
 
-                columns_text.insert(tk.END, f"{table_name}\n")
-                columns_text.insert(tk.END, "-" * 40 + "\n\n")
-
-                columns_text.insert(tk.END, "Columns:\n")
-                for i, col in enumerate(info.get('columns', []), 1):
-                    columns_text.insert(tk.END, f"  {i:2}. {col['name']} ({col['type']})\n")
+                # Rakit teks lengkap dulu, lalu 1x insert ke widget (bukan 1 insert per kolom)
+                lines = [table_name, "-" * 40, "", "Columns:"]
+                lines.extend(f"  {i:2}. {col['name']} ({col['type']})"
+                             for i, col in enumerate(info.get('columns', []), 1))
 
                 relations = info.get('relations', [])
                 if relations:
-                    columns_text.insert(tk.END, "\nRelations:\n")
-                    for rel in relations:
-                        columns_text.insert(tk.END,
-                            f"  -> {rel['from_column']} -> {rel['to_table']}.{rel['to_column']}\n")
+                    lines.append("")
+                    lines.append("Relations:")
+                    lines.extend(f"  -> {rel['from_column']} -> {rel['to_table']}.{rel['to_column']}"
+                                 for rel in relations)
+                columns_text.insert(tk.END, "\n".join(lines) + "\n")
 
                 columns_text.configure(state='disabled')
 
@@ -468,19 +558,14 @@ class AnQueryApp:
         state = {
             'primary_column': None,  # {'table': ..., 'column': ...}
             'selected_columns': [],  # [{'table': ..., 'column': ...}, ...]
+            'selected_keys': set(),  # {(table, column), ...} sejajar selected_columns (cek O(1))
             'filters': {},  # {'table.column': {'type': ..., 'value': ..., 'op': ...}, ...}
         }
 
-        # Build all columns list with type info
-        all_columns = []
-        for tbl, info in self.db.schema_cache.items():
-            for col in info['columns']:
-                all_columns.append({
-                    'table': tbl,
-                    'column': col['name'],
-                    'type': col['type'],
-                    'display': f"{tbl}.{col['name']}"
-                })
+        # All columns list with type info (di-cache di DatabaseManager per schema load)
+        all_columns = self.db.get_column_list()
+        # Lookup display -> info, di-build sekali per window (pencarian via db.search_column_list)
+        column_by_display = {c['display']: c for c in all_columns}
 
         header = tk.Frame(window, bg=COLORS['card'], padx=12, pady=8)
         header.pack(fill=tk.X)
@@ -525,11 +610,11 @@ class AnQueryApp:
             primary_listbox.insert(tk.END, col_info['display'])
 
         def filter_primary(*args):
-            search = search1_var.get().lower()
+            search = search1_var.get()
             primary_listbox.delete(0, tk.END)
-            for col_info in all_columns:
-                if search in col_info['display'].lower():
-                    primary_listbox.insert(tk.END, col_info['display'])
+            matches = self.db.search_column_list(search)
+            if matches:
+                primary_listbox.insert(tk.END, *matches)
 
         search1_var.trace('w', filter_primary)
 
@@ -547,20 +632,21 @@ class AnQueryApp:
             if selection:
                 display = primary_listbox.get(selection[0])
                 # Find the column info
-                for col_info in all_columns:
-                    if col_info['display'] == display:
-                        state['primary_column'] = {
-                            'table': col_info['table'],
-                            'column': col_info['column'],
-                            'type': col_info.get('type', 'text')
-                        }
-                        primary_selected_var.set(display)
-                        # Auto add to selected columns
-                        if col_info not in state['selected_columns']:
-                            state['selected_columns'] = [col_info.copy()]
-                        notebook.select(1)
-                        update_selected_listbox()
-                        break
+                col_info = column_by_display.get(display)
+                if col_info:
+                    state['primary_column'] = {
+                        'table': col_info['table'],
+                        'column': col_info['column'],
+                        'type': col_info.get('type', 'text')
+                    }
+                    primary_selected_var.set(display)
+                    # Auto add to selected columns
+                    key = (col_info['table'], col_info['column'])
+                    if key not in state['selected_keys']:
+                        state['selected_columns'] = [col_info.copy()]
+                        state['selected_keys'] = {key}
+                    notebook.select(1)
+                    update_selected_listbox()
 
         tk.Button(step1, text="Select Primary >", font=('Segoe UI', 9),
                  bg=COLORS['success'], fg='white', bd=0, padx=12, pady=4,
@@ -604,11 +690,11 @@ class AnQueryApp:
             avail_listbox.insert(tk.END, col_info['display'])
 
         def filter_available(*args):
-            search = search2_var.get().lower()
+            search = search2_var.get()
             avail_listbox.delete(0, tk.END)
-            for col_info in all_columns:
-                if search in col_info['display'].lower():
-                    avail_listbox.insert(tk.END, col_info['display'])
+            matches = self.db.search_column_list(search)
+            if matches:
+                avail_listbox.insert(tk.END, *matches)
 
         search2_var.trace('w', filter_available)
 
@@ -640,35 +726,38 @@ class AnQueryApp:
 
         def update_selected_listbox():
             selected_listbox.delete(0, tk.END)
+            primary = state['primary_column']
+            primary_key = f"{primary['table']}.{primary['column']}" if primary else None
+            filters = state['filters']
+            items = []
             for col_info in state['selected_columns']:
                 key = f"{col_info['table']}.{col_info['column']}"
-                marker = " (PRIMARY)" if state['primary_column'] and \
-                    col_info['table'] == state['primary_column']['table'] and \
-                    col_info['column'] == state['primary_column']['column'] else ""
+                marker = " (PRIMARY)" if key == primary_key else ""
                 # Show filter indicator
-                filter_marker = ""
-                if key in state['filters'] and state['filters'][key].get('value'):
-                    filter_marker = " [F]"
-                selected_listbox.insert(tk.END, f"{key}{marker}{filter_marker}")
+                filter_marker = " [F]" if key in filters and filters[key].get('value') else ""
+                items.append(f"{key}{marker}{filter_marker}")
+            if items:
+                selected_listbox.insert(tk.END, *items)
             if state['primary_column']:
                 step2_info_var.set(f"Primary: {state['primary_column']['table']}.{state['primary_column']['column']}")
 
         def add_columns():
+            selected_keys = state['selected_keys']
             for idx in avail_listbox.curselection():
-                display = avail_listbox.get(idx)
-                for col_info in all_columns:
-                    if col_info['display'] == display:
-                        # Check if already in selected
-                        exists = any(c['table'] == col_info['table'] and c['column'] == col_info['column']
-                                    for c in state['selected_columns'])
-                        if not exists:
-                            state['selected_columns'].append(col_info.copy())
-                        break
+                col_info = column_by_display.get(avail_listbox.get(idx))
+                if not col_info:
+                    continue
+                # Check if already in selected
+                key = (col_info['table'], col_info['column'])
+                if key not in selected_keys:
+                    selected_keys.add(key)
+                    state['selected_columns'].append(col_info.copy())
             update_selected_listbox()
 
         def remove_columns():
+            removed = set()
             for idx in reversed(selected_listbox.curselection()):
-                col_display = selected_listbox.get(idx).replace(" (PRIMARY)", "")
+                col_display = selected_listbox.get(idx).replace(" (PRIMARY)", "").replace(" [F]", "")
                 table, column = col_display.split('.')
                 # Don't allow removing primary
                 if state['primary_column'] and \
@@ -676,8 +765,11 @@ class AnQueryApp:
                    state['primary_column']['column'] == column:
                     messagebox.showwarning("Warning", "Cannot remove primary column!")
                     continue
+                removed.add((table, column))
+            if removed:
                 state['selected_columns'] = [c for c in state['selected_columns']
-                                             if not (c['table'] == table and c['column'] == column)]
+                                             if (c['table'], c['column']) not in removed]
+                state['selected_keys'] -= removed
             update_selected_listbox()
 
         def clear_columns():
@@ -688,8 +780,10 @@ class AnQueryApp:
                     'column': state['primary_column']['column'],
                     'type': state['primary_column'].get('type', 'text')
                 }]
+                state['selected_keys'] = {(state['primary_column']['table'], state['primary_column']['column'])}
             else:
                 state['selected_columns'] = []
+                state['selected_keys'] = set()
             state['filters'] = {}  # Clear filters too
             update_selected_listbox()
             update_filter_display()
@@ -717,40 +811,15 @@ class AnQueryApp:
                 filter_display.config(text="No filters (double-click column to add)", fg=COLORS['text_light'])
                 return
 
-            filter_texts = []
-            for key, flt in state['filters'].items():
-                val = flt.get('value')
-                # Check if has value (handle boolean False)
-                has_value = val is not None and val != ''
-                if not has_value and val is not False:
-                    continue
-
-                flt_type = flt.get('type', 'string')
+            # Hanya filter yang punya value (boolean False tetap dihitung)
+            summary = " | ".join(
+                f"{key} {FILTER_SUMMARY_BUILDERS.get(flt.get('type'), _string_filter_summary)(flt)}"
+                for key, flt in state['filters'].items()
+                if flt.get('value') not in (None, '')
+            )
 
-                if flt_type == 'boolean':
-                    val_str = f"= {'true' if val else 'false'}"
-                elif flt_type == 'date':
-                    op = flt.get('op', '>=')
-                    if op == 'BETWEEN' and flt.get('value_to'):
-                        val_str = f"BETWEEN '{val}' AND '{flt['value_to']}'"
-                    elif op == '=':
-                        val_str = f"= '{val}'"
-                    else:
-                        val_str = f">= '{val}'"
-                elif flt_type == 'numeric':
-                    op = flt.get('op', '=')
-                    val_str = f"{op} {val}"
-                else:  # string
-                    op = flt.get('op', 'LIKE')
-                    if op == 'LIKE':
-                        val_str = f"LIKE '%{val}%'"
-                    else:
-                        val_str = f"{op} '{val}'"
-
-                filter_texts.append(f"{key} {val_str}")
-
-            if filter_texts:
-                filter_display.config(text=" | ".join(filter_texts), fg=COLORS['primary'])
+            if summary:
+                filter_display.config(text=summary, fg=COLORS['primary'])
             else:
                 filter_display.config(text="No filters (double-click column to add)", fg=COLORS['text_light'])
 
@@ -1007,12 +1076,8 @@ class AnQueryApp:
             # Remove markers like (PRIMARY) and [F]
             col_key = item.replace(" (PRIMARY)", "").replace(" [F]", "").strip()
 
-            # Find column type
-            col_type = 'text'
-            for col_info in state['selected_columns']:
-                if f"{col_info['table']}.{col_info['column']}" == col_key:
-                    col_type = col_info.get('type', 'text')
-                    break
+            # Find column type (display == 'table.column')
+            col_type = column_by_display.get(col_key, {}).get('type', 'text')
 
             open_filter_dialog(col_key, col_type)
 
@@ -1074,103 +1139,15 @@ class AnQueryApp:
                     continue
 
                 table, column = col_key.split('.')
-                col_ref = f'"{table}"."{column}"'
-                flt_type = flt.get('type', 'string')
-                val = flt.get('value')
-
-                if flt_type == 'boolean':
-                    conditions.append(f"{col_ref} = %s")
-                    params.append(val)
-
-                elif flt_type == 'date':
-                    # Date filter - cast to date for proper comparison
-                    op = flt.get('op', '>=')
-                    if op == 'BETWEEN' and flt.get('value_to'):
-                        # Date range
-                        conditions.append(f"{col_ref}::date BETWEEN %s::date AND %s::date")
-                        params.append(val)
-                        params.append(flt['value_to'])
-                    elif op == '=':
-                        # Single date (exact match)
-                        conditions.append(f"{col_ref}::date = %s::date")
-                        params.append(val)
-                    else:
-                        # >= date
-                        conditions.append(f"{col_ref}::date >= %s::date")
-                        params.append(val)
-
-                elif flt_type == 'numeric':
-                    op = flt.get('op', '=')
-                    conditions.append(f"{col_ref} {op} %s")
-                    params.append(val)
-
-                else:  # string
-                    op = flt.get('op', 'LIKE')
-                    if op == 'LIKE':
-                        # Add wildcards if not present
-                        search_val = val if '%' in val else f'%{val}%'
-                        conditions.append(f"{col_ref} ILIKE %s")
-                        params.append(search_val)
-                    else:
-                        conditions.append(f"{col_ref} {op} %s")
-                        params.append(val)
+                build = FILTER_CLAUSE_BUILDERS.get(flt.get('type', 'string'), _string_filter_clause)
+                fragment, values = build(column_ref(table, column), flt)
+                conditions.append(fragment)
+                params.extend(values)
 
             if conditions:
                 return " AND ".join(conditions), params
             return "", []
 
-        def inject_where_clause(sql, where_clause):
-            """
-            Inject WHERE clause into SQL properly.
-            Strategy: Remove LIMIT, add WHERE, then re-add LIMIT at end.
-            """
-            import re
-
-            # Extract and remove LIMIT clause
-            limit_match = re.search(r'\nLIMIT\s+(\d+)', sql, re.IGNORECASE)
-            if not limit_match:
-                limit_match = re.search(r'\sLIMIT\s+(\d+)', sql, re.IGNORECASE)
-
-            limit_value = None
-            if limit_match:
-                limit_value = limit_match.group(1)
-                sql = sql[:limit_match.start()] + sql[limit_match.end():]
-
-            # Check if WHERE already exists
-            sql_upper = sql.upper()
-            where_match = re.search(r'\nWHERE\s', sql_upper)
-            if not where_match:
-                where_match = re.search(r'\sWHERE\s', sql_upper)
-
-            if where_match:
-                # WHERE exists - append with AND before ORDER BY or at end
-                order_match = re.search(r'\nORDER BY', sql_upper)
-                if not order_match:
-                    order_match = re.search(r'\sORDER BY', sql_upper)
-
-                if order_match:
-                    insert_pos = order_match.start()
-                    sql = sql[:insert_pos] + f" AND {where_clause}" + sql[insert_pos:]
-                else:
-                    sql = sql + f" AND {where_clause}"
-            else:
-                # No WHERE - find position after FROM/JOINs but before ORDER BY
-                order_match = re.search(r'\nORDER BY', sql_upper)
-                if not order_match:
-                    order_match = re.search(r'\sORDER BY', sql_upper)
-
-                if order_match:
-                    insert_pos = order_match.start()
-                    sql = sql[:insert_pos] + f"\nWHERE {where_clause}" + sql[insert_pos:]
-                else:
-                    sql = sql + f"\nWHERE {where_clause}"
-
-            # Re-add LIMIT at the end
-            if limit_value:
-                sql = sql + f"\nLIMIT {limit_value}"
-
-            return sql
-
         def execute_query():
             if not state['primary_column']:
                 messagebox.showwarning("Warning", "Please select a primary column first!")
@@ -1198,20 +1175,17 @@ class AnQueryApp:
                     query_text = f"show {primary_str}"
 
                 parsed = self.parser.parse(query_text)
-                sql, params, applied_filters = self.parser.build_sql(parsed)
 
-                # Add filter WHERE clause
+                # Filter WHERE clause ikut di-build oleh parser (param-nya sebelum LIMIT)
                 filter_where, filter_params = build_where_clause()
-                if filter_where:
-                    sql = inject_where_clause(sql, filter_where)
-
-                # Combine params from build_sql + additional filter params
-                all_params = params + filter_params
+                sql, all_params, applied_filters = self.parser.build_sql(
+                    parsed, extra_where=filter_where, extra_params=filter_params
+                )
 
                 # Display SQL with filter info
-                display_sql = sql
+                display_sql = format_sql_display(sql, all_params)
                 if applied_filters:
-                    display_sql = f"-- Auto-filters: {', '.join(applied_filters)}\n{sql}"
+                    display_sql = f"-- Auto-filters: {', '.join(applied_filters)}\n{display_sql}"
                 sql_text.delete('1.0', tk.END)
                 sql_text.insert('1.0', display_sql)
 
@@ -1238,7 +1212,7 @@ class AnQueryApp:
 
         def export_excel():
             if self.current_df is not None and len(self.current_df) > 0:
-                self.db.export_to_excel(self.current_df)
+                self._export_to_excel(self.current_df)
             else:
                 messagebox.showwarning("Warning", "No data to export!")
 
@@ -1346,8 +1320,9 @@ class AnQueryApp:
                 limit = 10
 
             try:
-                count = self._execute_with_retry(self.db.get_table_count, table_name)
-                info_var.set(f"Total: {count:,} rows | Showing: {min(limit, count)}")
+                count, is_estimate = self._execute_with_retry(self.db.get_table_count_fast, table_name)
+                approx = "~" if is_estimate else ""
+                info_var.set(f"Total: {approx}{count:,} rows | Showing: {min(limit, count)}")
 
                 df = self._execute_with_retry(self.db.preview_table, table_name, limit)
                 self.current_df = df
@@ -1367,7 +1342,7 @@ class AnQueryApp:
 
         def export():
             if self.current_df is not None and len(self.current_df) > 0:
-                self.db.export_to_excel(self.current_df)
+                self._export_to_excel(self.current_df)
             else:
                 messagebox.showwarning("Warning", "No data to export!")
 
@@ -1427,30 +1402,39 @@ class AnQueryApp:
 
         return library
 
-    def _search_column_library(self, library, keyword):
-        """Search column library"""
+    @staticmethod
+    def _index_column_library(library):
+        """Lowercase nama / alias / tabel per kolom library, di-build sekali per window"""
+        return [
+            (col_name, info, col_name.lower(),
+             [a.lower() for a in info['aliases']], [t.lower() for t in info['tables']])
+            for col_name, info in library.items()
+        ]
+
+    def _search_column_library(self, library_index, keyword):
+        """Search column library (library_index dari _index_column_library)"""
         if not keyword:
-            return list(library.items())
+            return [(col_name, info) for col_name, info, _, _, _ in library_index]
 
         keyword_lower = keyword.lower()
         results = []
 
-        for col_name, info in library.items():
+        for col_name, info, name_lower, aliases_lower, tables_lower in library_index:
             score = 0
             # Exact match
-            if col_name.lower() == keyword_lower:
+            if name_lower == keyword_lower:
                 score = 100
             # Starts with
-            elif col_name.lower().startswith(keyword_lower):
+            elif name_lower.startswith(keyword_lower):
                 score = 80
             # Contains in name
-            elif keyword_lower in col_name.lower():
+            elif keyword_lower in name_lower:
                 score = 60
             # Match in alias
-            elif any(keyword_lower in a.lower() for a in info['aliases']):
+            elif any(keyword_lower in a for a in aliases_lower):
                 score = 50
             # Match in table name
-            elif any(keyword_lower in t.lower() for t in info['tables']):
+            elif any(keyword_lower in t for t in tables_lower):
                 score = 40
 
             if score > 0:
@@ -1467,6 +1451,7 @@ class AnQueryApp:
 
         # Build column library
         column_library = self._build_column_library()
+        library_index = self._index_column_library(column_library)
 
         window = tk.Toplevel(self.root)
         window.title("Smart Query - An Query")
@@ -1658,7 +1643,7 @@ class AnQueryApp:
         # Function to populate library
         def populate_library(search_term=None):
             lib_tree.delete(*lib_tree.get_children())
-            results = self._search_column_library(column_library, search_term)
+            results = self._search_column_library(library_index, search_term)
 
             for col_name, info in results[:100]:  # Limit 100
                 tables = ', '.join(info['tables'][:2])
@@ -1726,30 +1711,13 @@ class AnQueryApp:
 
                 # Transform boolean labels
                 boolean_labels = self.config.get('boolean_labels', {})
-                if boolean_labels:
-                    for col in df.columns:
-                        col_name = col.split('.')[-1] if '.' in col else col
-                        # Try original name, then with underscore instead of space
-                        col_underscore = col_name.replace(' ', '_')
-                        label_map = None
-                        if col_name in boolean_labels:
-                            label_map = boolean_labels[col_name]
-                        elif col_underscore in boolean_labels:
-                            label_map = boolean_labels[col_underscore]
-                        if label_map:
-                            df[col] = df[col].apply(
-                                lambda x, lm=label_map: lm.get(x, lm.get(bool(x) if x is not None else None, x))
-                            )
+                if boolean_labels and not df.empty:
+                    apply_boolean_labels(df, boolean_label_columns(df.columns, boolean_labels))
 
                 self.current_df = df
 
                 sql_text.delete('1.0', tk.END)
-                display_sql = sql
-                for p in (params or []):
-                    if isinstance(p, bool):
-                        display_sql = display_sql.replace('%s', str(p).upper(), 1)
-                    else:
-                        display_sql = display_sql.replace('%s', f"'{p}'", 1)
+                display_sql = format_sql_display(sql, params)
                 if applied_filters:
                     display_sql = f"-- Auto-filters: {', '.join(applied_filters)}\n{display_sql}"
                 sql_text.insert('1.0', display_sql)
@@ -1773,7 +1741,7 @@ class AnQueryApp:
 
         def export():
             if self.current_df is not None and len(self.current_df) > 0:
-                self.db.export_to_excel(self.current_df)
+                self._export_to_excel(self.current_df)
             else:
                 messagebox.showwarning("Warning", "No data to export!")
 
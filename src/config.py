@@ -15,6 +15,7 @@ import sys
 # =============================================================================
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIG_DIR = os.path.join(ROOT_DIR, 'config')
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.dbstudio_cache')
 
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
@@ -50,6 +51,11 @@ def get_base_path():
     return ROOT_DIR
 
 
+def get_cache_path(db_key, suffix):
+    """Get path file cache lokal untuk database tertentu (di ~/.dbstudio_cache)"""
+    return os.path.join(CACHE_DIR, f"{db_key}.{suffix}")
+
+
 def get_available_databases():
     """
     Get list of available databases.
@@ -4,55 +4,240 @@ DB Studio - Database Manager
 Mengelola koneksi dan operasi database PostgreSQL.
 """
 
+import os
+import sys
+import time
+import pickle
+from contextlib import contextmanager
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import psycopg2.sql
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from tkinter import filedialog, messagebox
+
+
+def boolean_label_columns(columns, boolean_labels):
+    """Map {kolom_df: label_map} untuk kolom hasil query yang punya boolean label"""
+    col_to_map = {}
+    for col in columns:
+        # Get actual column name (bisa ada prefix table)
+        col_name = col.rsplit('.', 1)[-1]
+        # Try original name, then with underscore instead of space
+        label_map = boolean_labels.get(col_name) or boolean_labels.get(col_name.replace(' ', '_'))
+        if label_map:
+            col_to_map[col] = label_map
+    return col_to_map
+
+
+def apply_boolean_labels(df, col_to_map):
+    """
+    Ganti nilai boolean/integer dengan label (in-place, vectorized per kolom).
+    Exact match key dulu, lalu fallback bool(x) per distinct value sisanya.
+    None/NULL hanya diganti jika ada key None; NaN ikut bool(NaN) -> label True.
+    """
+    for col, label_map in col_to_map.items():
+        series = df[col]
+        # bool/int/float tetap native supaya perbandingan jalan di numpy C loop
+        if series.dtype.kind in 'biuf':
+            arr = series.to_numpy()
+        else:
+            arr = series.to_numpy(dtype=object)
+        out = series.to_numpy(dtype=object, copy=True)
+        matched = np.zeros(len(arr), dtype=bool)
+
+        # Exact match per key label_map (biasanya 2-3 key)
+        for key, label in label_map.items():
+            mask = (arr == key) & ~matched
+            out[mask] = label
+            matched |= mask
+
+        # Fallback bool(x) sekali per distinct value sisanya (mis. 2 -> True, NaN -> True)
+        rest = ~matched
+        if rest.any():
+            for value in pd.unique(arr[rest]):
+                if value is None or bool(value) not in label_map:
+                    continue
+                if value != value:
+                    # NaN tidak pernah == dirinya sendiri, mask lewat isna (None sudah dilewati)
+                    mask = pd.isna(arr) & np.not_equal(arr, None)
+                else:
+                    mask = arr == value
+                out[rest & mask] = label_map[bool(value)]
+            # None tanpa label tampil sebagai NaN (sama dengan hasil Series.apply sebelumnya)
+            if arr.dtype == object:
+                out[rest & np.equal(arr, None)] = np.nan
+
+        df[col] = pd.Series(out, index=df.index, dtype=object)
+    return df
+
+
+def _xlsx_rows(df):
+    """Convert DataFrame ke row tuples yang siap ditulis xlsxwriter"""
+    # NaN/NaT -> cell kosong, datetime -> ISO string (sekali, vectorized)
+    data = df.astype(object).where(df.notna(), None)
+    for col in df.select_dtypes(include=['datetime', 'datetimetz']).columns:
+        iso = df[col].dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+        data[col] = iso.where(df[col].notna(), None)
+    return data.itertuples(index=False, name=None)
+
+
+def write_xlsx_chunks(chunks, filename):
+    """
+    Tulis DataFrame chunks ke Excel via xlsxwriter (constant_memory).
+    Row di-stream langsung ke disk, jadi memory tetap flat untuk result besar.
+
+    Returns:
+        int: jumlah row yang ditulis
+    """
+    import xlsxwriter  # lazy: hanya dibutuhkan saat export
+
+    workbook = xlsxwriter.Workbook(filename, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'remove_timezone': True,
+        'default_date_format': 'yyyy-mm-dd',
+    })
+    worksheet = workbook.add_worksheet()
+
+    row_idx = 0
+    for i, df in enumerate(chunks):
+        if i == 0:
+            worksheet.write_row(0, 0, [str(c) for c in df.columns])
+        for row in _xlsx_rows(df):
+            row_idx += 1
+            worksheet.write_row(row_idx, 0, row)
+    workbook.close()
+    return row_idx
+
+
+def write_xlsx(df, filename):
+    """Tulis DataFrame ke Excel via xlsxwriter (constant_memory)"""
+    write_xlsx_chunks([df], filename)
+    return filename
 
 
 class DatabaseManager:
     """Mengelola koneksi dan operasi database"""
 
+    TABLE_COUNTS_TTL = 60  # detik, juga untuk COUNT(*) per tabel
+    EXACT_COUNT_THRESHOLD = 100000  # di bawah estimasi ini COUNT(*) masih murah
+    POOL_MAX_CONN = 8
+    # TCP keepalive supaya koneksi idle tidak diputus diam-diam oleh NAT/firewall
+    KEEPALIVE_PARAMS = {
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+    }
+
     def __init__(self, db_config):
         self.db_config = db_config
+        self.pool = None
         self.conn = None
         self.schema_cache = {}
         self.relations_cache = {}
+        self.total_column_count = 0
+        self._column_list = None
+        self._column_search_index = None
+        self._schema_fingerprint_value = None
+        self._table_counts = None
+        self._table_counts_time = 0
+        self._count_cache = {}  # table_name -> (timestamp, count)
 
     def connect(self):
-        """Connect ke database"""
+        """
+        Connect ke database.
+        Koneksi utama (self.conn) diambil dari pool; query pendek dari thread lain
+        (count, metadata) meminjam koneksi pool sendiri via _cursor().
+        """
         try:
-            self.conn = psycopg2.connect(**self.db_config)
+            params = {**self.KEEPALIVE_PARAMS, **self.db_config}
+            self.pool = psycopg2.pool.ThreadedConnectionPool(1, self.POOL_MAX_CONN, **params)
+            self.conn = self.pool.getconn()
             return True
         except Exception as e:
             print(f"Connection error: {e}")
+            self.disconnect()
             return False
 
     def disconnect(self):
         """Disconnect dari database"""
-        if self.conn:
+        if self.pool:
+            try:
+                self.pool.closeall()
+            except:
+                pass
+            self.pool = None
+        elif self.conn:
             try:
                 self.conn.close()
             except:
                 pass
-            self.conn = None
+        self.conn = None
 
-    def is_alive(self):
-        """Cek apakah koneksi masih aktif"""
+    @contextmanager
+    def _cursor(self):
+        """
+        Cursor dari koneksi pool (bukan self.conn), aman dipakai paralel dari thread lain.
+        Transaction di-rollback sebelum koneksi dikembalikan (semua operasi read-only).
+        """
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+        finally:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def is_alive(self, deep=False):
+        """
+        Cek apakah koneksi masih aktif.
+        Default hanya cek status libpq lokal (tanpa round-trip); socket mati
+        terdeteksi lewat TCP keepalive. deep=True menambah probe SELECT 1.
+        """
         try:
             if self.conn is None or self.conn.closed:
                 return False
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT 1")
+            if self.conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if deep:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
             return True
         except:
             return False
 
     def reconnect(self):
-        """Reconnect ke database"""
+        """
+        Reconnect ke database.
+        Koneksi utama yang mati dibuang dan diganti koneksi dari pool (idle yang
+        masih hidup dipakai ulang, tanpa handshake baru); pool baru hanya dibuat
+        jika itu gagal.
+        """
+        self.invalidate_cache()
+        if self.pool and self.conn is not None:
+            try:
+                for _ in range(self.POOL_MAX_CONN):
+                    self.pool.putconn(self.conn, close=True)
+                    self.conn = self.pool.getconn()
+                    if self.is_alive(deep=True):
+                        self.conn.rollback()
+                        return True
+            except Exception:
+                pass
         self.disconnect()
         return self.connect()
 
+    def invalidate_cache(self):
+        """Buang cache jumlah row (estimasi + COUNT(*) per tabel)"""
+        self._table_counts = None
+        self._table_counts_time = 0
+        self._count_cache.clear()
+
     def rollback(self):
         """Rollback transaction"""
         if self.conn:
@@ -61,12 +246,96 @@ class DatabaseManager:
             except:
                 pass
 
-    def get_full_schema(self):
-        """Get schema lengkap dari database"""
+    def get_full_schema(self, cache_path=None, refresh=False):
+        """
+        Get schema lengkap dari database.
+
+        Jika cache_path diberikan, schema + relasi di-cache ke disk (pickle) dan
+        dipakai ulang selama fingerprint katalog tidak berubah; refresh=True
+        memaksa introspeksi ulang.
+        """
         if not self.conn:
             return {}
 
+        fingerprint = None
+        if cache_path:
+            fingerprint = self._schema_fingerprint()
+            if not refresh:
+                # Schema di memory masih valid (mis. setelah reconnect): pakai apa adanya
+                if self.schema_cache and fingerprint == self._schema_fingerprint_value:
+                    return self.schema_cache
+                if self._load_schema_cache(cache_path, fingerprint):
+                    self._schema_fingerprint_value = fingerprint
+                    return self.schema_cache
+
+        self._introspect_schema()
+        self._schema_fingerprint_value = fingerprint
+
+        if cache_path:
+            self._save_schema_cache(cache_path, fingerprint)
+        return self.schema_cache
+
+    def _schema_fingerprint(self):
+        """
+        Fingerprint murah dari katalog (1 query, tanpa information_schema).
+        DDL apa pun (tabel/kolom/FK) menulis ulang row katalog -> count/xmin berubah.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT
+                    (SELECT count(*) || ':' || coalesce(max(c.xmin::text::bigint), 0)
+                     FROM pg_class c
+                     JOIN pg_namespace n ON n.oid = c.relnamespace
+                     WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')),
+                    (SELECT count(*) || ':' || coalesce(max(a.xmin::text::bigint), 0)
+                     FROM pg_attribute a
+                     JOIN pg_class c ON c.oid = a.attrelid
+                     JOIN pg_namespace n ON n.oid = c.relnamespace
+                     WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+                         AND a.attnum > 0 AND NOT a.attisdropped),
+                    (SELECT count(*) || ':' || coalesce(max(c.xmin::text::bigint), 0)
+                     FROM pg_constraint c
+                     JOIN pg_namespace n ON n.oid = c.connamespace
+                     WHERE n.nspname = 'public' AND c.contype = 'f')
+            """)
+            return cur.fetchone()
+
+    def _load_schema_cache(self, cache_path, fingerprint):
+        """Load schema dari disk cache. Return False jika tidak ada / basi / rusak."""
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_fingerprint, schema, relations = pickle.load(f)
+        except Exception:
+            return False
+        if cached_fingerprint != fingerprint:
+            return False
+
+        self.schema_cache = schema
+        self.relations_cache = relations
+        self.total_column_count = sum(len(t['columns']) for t in schema.values())
+        self._column_list = None
+        self._column_search_index = None
+        return True
+
+    def _save_schema_cache(self, cache_path, fingerprint):
+        """Simpan schema ke disk cache (gagal tulis diabaikan)"""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump(
+                    (fingerprint, self.schema_cache, self.relations_cache),
+                    f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+        except OSError:
+            pass
+
+    def _introspect_schema(self):
+        """Introspeksi tabel, kolom, dan FK dari database (3 query)"""
         self.schema_cache = {}
+        self.relations_cache = {}
+        self.total_column_count = 0
+        self._column_list = None
+        self._column_search_index = None
 
         with self.conn.cursor() as cur:
             # Get tables
@@ -78,79 +347,236 @@ class DatabaseManager:
             tables = [row[0] for row in cur.fetchall()]
 
             for table in tables:
-                # Get columns
-                cur.execute("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_schema = 'public' AND table_name = %s
-                    ORDER BY ordinal_position
-                """, (table,))
-                columns = [{'name': row[0], 'type': row[1]} for row in cur.fetchall()]
-
-                # Get relations
-                cur.execute("""
-                    SELECT
-                        kcu.column_name as from_column,
-                        ccu.table_name as to_table,
-                        ccu.column_name as to_column
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                        AND tc.table_name = %s
-                """, (table,))
-                relations = [
-                    {'from_column': row[0], 'to_table': row[1], 'to_column': row[2]}
-                    for row in cur.fetchall()
-                ]
-
-                self.schema_cache[table] = {
-                    'columns': columns,
-                    'relations': relations
+                self.schema_cache[table] = {'columns': [], 'relations': []}
+
+            # Get columns semua tabel sekaligus (1 round-trip, bukan 1 per tabel)
+            cur.execute("""
+                SELECT table_name, column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+                ORDER BY table_name, ordinal_position
+            """)
+            # Nama kolom umum (id, name, created_at) dan tipe data berulang di ribuan
+            # row: intern supaya semua dict kolom berbagi satu objek string
+            columns_of = {table: info['columns'] for table, info in self.schema_cache.items()}
+            for table, column_name, data_type in cur.fetchall():
+                columns = columns_of.get(table)
+                if columns is not None:
+                    columns.append({'name': sys.intern(column_name), 'type': sys.intern(data_type)})
+
+            # Get relations semua tabel sekaligus, langsung dari pg_catalog
+            # (view information_schema jauh lebih berat). conkey/confkey di-unnest
+            # berpasangan supaya FK multi-kolom tidak jadi cross product.
+            cur.execute("""
+                SELECT
+                    cl.relname as from_table,
+                    a.attname as from_column,
+                    cl2.relname as to_table,
+                    a2.attname as to_column
+                FROM pg_constraint c
+                JOIN pg_class cl ON cl.oid = c.conrelid
+                JOIN pg_namespace n ON n.oid = cl.relnamespace
+                JOIN pg_class cl2 ON cl2.oid = c.confrelid
+                CROSS JOIN LATERAL unnest(c.conkey, c.confkey) AS k(from_attnum, to_attnum)
+                JOIN pg_attribute a
+                    ON a.attrelid = c.conrelid AND a.attnum = k.from_attnum
+                JOIN pg_attribute a2
+                    ON a2.attrelid = c.confrelid AND a2.attnum = k.to_attnum
+                WHERE c.contype = 'f'
+                    AND n.nspname = 'public'
+                ORDER BY cl.relname, c.conname
+            """)
+            for table, from_column, to_table, to_column in cur.fetchall():
+                if table in self.schema_cache:
+                    self.schema_cache[table]['relations'].append({
+                        'from_column': sys.intern(from_column),
+                        'to_table': sys.intern(to_table),
+                        'to_column': sys.intern(to_column),
+                    })
+
+        for table, info in self.schema_cache.items():
+            if info['relations']:
+                self.relations_cache[table] = info['relations']
+
+        self.total_column_count = sum(len(t['columns']) for t in self.schema_cache.values())
+
+    def get_column_list(self):
+        """
+        Flat list semua kolom: [{'table', 'column', 'type', 'display'}, ...].
+        Di-build sekali per schema load (dipakai ulang tiap window Generate Query).
+        """
+        if self._column_list is None:
+            self._column_list = [
+                {
+                    'table': table,
+                    'column': col['name'],
+                    'type': col['type'],
+                    'display': f"{table}.{col['name']}"
                 }
+                for table, info in self.schema_cache.items()
+                for col in info['columns']
+            ]
+        return self._column_list
 
-                if relations:
-                    self.relations_cache[table] = relations
+    def search_column_list(self, keyword):
+        """
+        Display kolom (urutan sama dengan get_column_list) yang mengandung keyword.
+        Keyword >= 3 karakter: kandidat dari trigram index (di-build sekali per
+        schema load), lalu diverifikasi dengan substring check.
+        """
+        columns = self.get_column_list()
+        if self._column_search_index is None:
+            displays_lower = [c['display'].lower() for c in columns]
+            trigrams = {}
+            for i, text in enumerate(displays_lower):
+                for gram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                    trigrams.setdefault(gram, []).append(i)
+            self._column_search_index = (displays_lower, trigrams)
 
-        return self.schema_cache
+        displays_lower, trigrams = self._column_search_index
+        keyword = keyword.lower()
+        if len(keyword) < 3:
+            return [c['display'] for c, text in zip(columns, displays_lower) if keyword in text]
 
-    def execute_query(self, sql, params=None):
-        """Execute query dan return DataFrame"""
+        postings = sorted(
+            (trigrams.get(keyword[j:j + 3], ()) for j in range(len(keyword) - 2)), key=len
+        )
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return [columns[i]['display'] for i in sorted(candidates) if keyword in displays_lower[i]]
+
+    def execute_query(self, sql, params=None, chunksize=10000):
+        """
+        Execute query dan return DataFrame.
+        Row diambil per chunk (fetchmany) dan langsung dipecah per kolom, jadi
+        tidak pernah ada list tuple seluruh hasil di memory bersamaan.
+        """
         self.rollback()
 
         with self.conn.cursor() as cur:
             cur.execute(sql, params)
             columns = [desc[0] for desc in cur.description]
-            data = cur.fetchall()
+            values = [[] for _ in columns]
+            has_rows = False
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                has_rows = True
+                for column_values, chunk_values in zip(values, zip(*rows)):
+                    column_values.extend(chunk_values)
 
-        return pd.DataFrame(data, columns=columns)
+        if not has_rows:
+            return pd.DataFrame([], columns=columns)
+        # Key posisi (bukan nama) supaya nama kolom duplikat tetap aman
+        df = pd.DataFrame(dict(enumerate(values)))
+        df.columns = columns
+        return df
 
-    def get_table_count(self, table_name):
-        """Get jumlah row dalam tabel"""
+    def iter_query(self, sql, params=None, chunksize=5000):
+        """
+        Stream hasil query via server-side (named) cursor.
+        Yield DataFrame per chunk, minimal 1 chunk (bisa kosong) agar kolom tetap ada.
+        """
+        self.rollback()
+
+        with self.conn.cursor(name='dbstudio_stream') as cur:
+            cur.itersize = chunksize
+            cur.execute(sql, params)
+            rows = cur.fetchmany(chunksize)
+            columns = [desc[0] for desc in cur.description]
+            yield pd.DataFrame(rows, columns=columns)
+
+            while len(rows) == chunksize:
+                rows = cur.fetchmany(chunksize)
+                if rows:
+                    yield pd.DataFrame(rows, columns=columns)
+
+    def query_columns(self, sql, params=None):
+        """Nama kolom hasil query tanpa mengambil row (dibungkus LIMIT 0)"""
         self.rollback()
+
         with self.conn.cursor() as cur:
-            cur.execute(f'SELECT COUNT(*) FROM "{table_name}"')
-            return cur.fetchone()[0]
+            cur.execute(f"SELECT * FROM ({sql}) AS _q LIMIT 0", params)
+            return [desc[0] for desc in cur.description]
+
+    def copy_query(self, sql, params, fileobj):
+        """
+        Stream hasil query sebagai CSV (dengan header) ke fileobj via COPY ... TO STDOUT.
+        Jalur export tercepat: row tidak pernah jadi object Python.
+
+        Returns:
+            int: jumlah row yang ditulis
+        """
+        self.rollback()
+
+        with self.conn.cursor() as cur:
+            query = cur.mogrify(sql, params)
+            cur.copy_expert(b'COPY (' + query + b') TO STDOUT WITH (FORMAT CSV, HEADER TRUE)', fileobj)
+            return cur.rowcount
+
+    def get_table_count(self, table_name):
+        """Get jumlah row dalam tabel (di-cache selama TABLE_COUNTS_TTL detik)"""
+        now = time.monotonic()
+        cached = self._count_cache.get(table_name)
+        if cached is not None and now - cached[0] < self.TABLE_COUNTS_TTL:
+            return cached[1]
+
+        with self._cursor() as cur:
+            cur.execute(
+                psycopg2.sql.SQL('SELECT COUNT(*) FROM {}').format(psycopg2.sql.Identifier(table_name))
+            )
+            count = cur.fetchone()[0]
+
+        self._count_cache[table_name] = (now, count)
+        return count
+
+    def get_table_count_fast(self, table_name):
+        """
+        Jumlah row untuk tampilan menu: estimasi pg_class.reltuples untuk tabel besar,
+        COUNT(*) untuk tabel kecil / belum pernah di-ANALYZE.
+
+        Returns:
+            tuple: (count, is_estimate)
+        """
+        estimate = self.get_all_table_counts().get(table_name, -1)
+        if estimate > self.EXACT_COUNT_THRESHOLD:
+            return estimate, True
+        return self.get_table_count(table_name), False
+
+    def get_all_table_counts(self):
+        """
+        Get estimasi jumlah row semua tabel dalam 1 query (pg_class.reltuples).
+        Hasil di-cache selama TABLE_COUNTS_TTL detik.
+
+        Returns:
+            dict: {table_name: approx_count}, -1 jika tabel belum pernah di-ANALYZE
+        """
+        now = time.monotonic()
+        if self._table_counts is not None and now - self._table_counts_time < self.TABLE_COUNTS_TTL:
+            return self._table_counts
+
+        with self._cursor() as cur:
+            cur.execute("""
+                SELECT c.relname, c.reltuples::bigint
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+            """)
+            self._table_counts = dict(cur.fetchall())
+
+        self._table_counts_time = now
+        return self._table_counts
 
     def preview_table(self, table_name, limit=10):
         """Preview data dari tabel"""
-        sql = f'SELECT * FROM "{table_name}" LIMIT {limit}'
-        return self.execute_query(sql)
-
-    def export_to_excel(self, df, filename=None):
-        """Export DataFrame ke Excel"""
-        if filename is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = filedialog.asksaveasfilename(
-                defaultextension='.xlsx',
-                filetypes=[('Excel files', '*.xlsx')],
-                initialfile=f'export_{timestamp}.xlsx'
-            )
+        # Identifier di-quote oleh psycopg2, LIMIT sebagai parameter (teks query tetap sama)
+        sql = psycopg2.sql.SQL('SELECT * FROM {} LIMIT %s').format(psycopg2.sql.Identifier(table_name))
+        return self.execute_query(sql, (int(limit),))
 
-        if filename:
-            df.to_excel(filename, index=False)
-            messagebox.showinfo("Success", f"Data exported ke:\n{filename}")
-            return filename
-        return None
+    def export_to_excel(self, df, filename):
+        """
+        Export DataFrame ke Excel.
+        Tanpa UI: dialog pilih file & notifikasi ada di GUI (AnQueryApp._export_to_excel).
+        """
+        write_xlsx(df, filename)
+        return filename
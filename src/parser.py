@@ -14,35 +14,77 @@ Mappings otomatis dibuat dari schema database:
 """
 
 import re
+import heapq
 from datetime import datetime
+from functools import lru_cache
 
 # Valid identifier pattern untuk SQL (letters, numbers, underscore)
 VALID_IDENTIFIER_PATTERN = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
 
-# Supported date formats untuk parsing
-DATE_FORMATS = [
-    '%Y-%m-%d',      # 2025-01-15
-    '%d-%m-%Y',      # 15-01-2025
-    '%d/%m/%Y',      # 15/01/2025
-    '%Y/%m/%d',      # 2025/01/15
-    '%d.%m.%Y',      # 15.01.2025
-    '%Y%m%d',        # 20250115
-]
-
-
+# Pattern parsing kondisi WHERE (di-compile sekali, dipakai tiap query)
+CONDITION_SPLIT_PATTERN = re.compile(r'\s+and\s+|,', re.IGNORECASE)  # cond1 and cond2, cond3
+DATE_RANGE_TO_PATTERN = re.compile(r'\s+to\s+', re.IGNORECASE)       # start to end
+VALUE_SPLIT_PATTERN = re.compile(r'[/|]')                            # val1/val2|val3
+QUOTED_COLUMN_PATTERN = re.compile(r'"(\w+)"."(\w+)"')               # "table"."column"
+CONDITION_OPERATOR_PATTERN = re.compile(r'>=|<=|!=|<>|>|<|=')        # operator pertama di kondisi
+
+# Kolom umum yang butuh prefix tabel (talent.name -> 'talent_name', alias "talent name")
+COMMON_COLUMNS = frozenset({'name', 'id', 'code', 'type', 'status', 'date', 'description', 'title'})
+# Tabel prioritas tinggi untuk base table (urutan = prioritas)
+PRIORITY_TABLES = ('job', 'job_detail', 'job_schedule')
+# Core business tables yang sering digunakan
+CORE_TABLES = frozenset({'job', 'job_detail', 'job_schedule', 'talent', 'company', 'payment'})
+# Relasi via file_content, attachment, dll biasanya tidak relevan untuk bisnis
+IRRELEVANT_TABLES = frozenset({'file_content', 'attachment', 'document_history', 'file_history'})
+# Format: count:kolom, sum:kolom, avg:kolom, min:kolom, max:kolom
+AGGREGATE_FUNCS = frozenset({'count', 'sum', 'avg', 'min', 'max'})
+# WHERE (also support "when" as alias)
+WHERE_KEYWORDS = (' where ', ' when ')
+# Nilai "sudah terjadi" / "kosong" untuk kolom tanggal: completed_on=completed, completed_on=belum
+DONE_VALUES = frozenset({'completed', 'done', 'finished', 'yes', 'true', 'ada'})
+EMPTY_VALUES = frozenset({'none', 'null', 'empty', 'kosong', 'belum', 'no', 'false', 'tidak'})
+# Tipe kolom (lowercase) untuk penanganan khusus di WHERE
+DATE_TYPES = frozenset({'timestamp', 'timestamptz', 'date', 'timestamp with time zone', 'timestamp without time zone'})
+TEXT_TYPES = frozenset({'text', 'varchar', 'character varying', 'char', 'character', 'name'})
+
+SUPPORTED_FORMATS_MESSAGE = (
+    "Format yang didukung:\n"
+    "1. primary job_number show talent_name,company where status=completed\n"
+    "2. job_number: talent_name,company where status=completed\n"
+    "3. show job_number,talent_name where status=completed"
+)
+
+# Supported date formats untuk parsing, 1 regex untuk semua format:
+#   2025-01-15, 2025/01/15            (Y-m-d, Y/m/d)
+#   15-01-2025, 15/01/2025, 15.01.2025 (d-m-Y, d/m/Y, d.m.Y)
+#   20250115                          (Ymd)
+DATE_PATTERN = re.compile(
+    r'(?P<ymd>(?P<ymd_y>\d{4})(?P<ymd_sep>[-/])(?P<ymd_m>\d{1,2})(?P=ymd_sep)(?P<ymd_d>\d{1,2}))'
+    r'|(?P<dmy>(?P<dmy_d>\d{1,2})(?P<dmy_sep>[-/.])(?P<dmy_m>\d{1,2})(?P=dmy_sep)(?P<dmy_y>\d{4}))'
+    r'|(?P<compact>(?P<compact_y>\d{4})(?P<compact_m>\d{2})(?P<compact_d>\d{2}))'
+)
+
+
+@lru_cache(maxsize=256)
 def parse_date(date_str):
     """
-    Parse date string dengan berbagai format.
+    Parse date string dengan berbagai format (pure, di-cache per string).
     Returns: string dalam format YYYY-MM-DD atau original jika gagal parse.
     """
     date_str = date_str.strip()
 
-    for fmt in DATE_FORMATS:
+    match = DATE_PATTERN.fullmatch(date_str)
+    if match:
+        kind = match.lastgroup
         try:
-            dt = datetime.strptime(date_str, fmt)
+            dt = datetime(
+                int(match.group(f'{kind}_y')),
+                int(match.group(f'{kind}_m')),
+                int(match.group(f'{kind}_d')),
+            )
             return dt.strftime('%Y-%m-%d')
         except ValueError:
-            continue
+            pass
 
     # Return original jika tidak bisa parse (biarkan database handle)
     return date_str
@@ -60,6 +102,40 @@ def sanitize_identifier(name):
     return name
 
 
+@lru_cache(maxsize=4096)
+def quote_identifier(name):
+    """Quote SQL identifier: job -> "job" (embedded quote di-escape)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=4096)
+def column_ref(table, column):
+    """Quoted reference table.column untuk SQL builder, di-cache per pasangan"""
+    return quote_identifier(table) + '.' + quote_identifier(column)
+
+
+def format_sql_display(sql, params):
+    """
+    Substitusi params ke placeholder %s untuk tampilan SQL (bukan untuk dieksekusi).
+    1 split + join, jadi '%s' di dalam nilai param tidak ikut tersubstitusi.
+    """
+    if not params:
+        return sql
+    parts = sql.split('%s')
+    out = [parts[0]]
+    for p, segment in zip(params, parts[1:]):
+        if isinstance(p, bool):
+            out.append(str(p).upper())
+        elif isinstance(p, (int, float)):
+            out.append(str(p))
+        else:
+            out.append(f"'{p}'")
+        out.append(segment)
+    # Placeholder lebih banyak dari params: biarkan apa adanya
+    out.extend('%s' + segment for segment in parts[len(params) + 1:])
+    return ''.join(out)
+
+
 class QueryParser:
     """Parser untuk query format sederhana"""
 
@@ -78,13 +154,21 @@ class QueryParser:
         self.custom_mappings = self.config.get('custom_mappings', {})
         self.status_mappings = self.config.get('status_mappings', {})
         self.status_keywords = self.config.get('status_keywords', ['status', 'state', 'kondisi'])
+        # Semua status keyword jadi 1 regex alternation: nama kolom cukup di-scan sekali
+        self._status_keyword_re = re.compile(
+            '|'.join(re.escape(kw) for kw in sorted(self.status_keywords, key=len, reverse=True))
+        ) if self.status_keywords else None
         self.default_filters = self.config.get('default_filters', {})
         self.preferred_paths = self.config.get('preferred_paths', {})
 
         # Auto-generated mappings from schema
         # column_map: key -> list of {table, column}
         self.column_map = {}
-        self.table_columns = {}
+        self.table_columns = {}  # table -> [column] (urutan schema)
+        self.column_types = {}  # table -> {lower(column): lower(type)}
+        self._column_lookup = {}  # table -> {lower(column) tanpa '_': column}
+        self._date_columns = {}  # table -> frozenset(lower(column)) bertipe DATE_TYPES
+        self._text_columns = {}  # table -> frozenset(lower(column)) bertipe TEXT_TYPES
 
         # Reverse relations: to_table -> [{from_table, from_column, to_column}]
         self.reverse_relations = {}
@@ -92,6 +176,12 @@ class QueryParser:
         # Lazy-loaded caches
         self._fuzzy_cache = {}  # Cache untuk fuzzy search results
         self._fuzzy_index_built = False  # Flag untuk lazy build
+        self._fuzzy_entries = ()  # ((table, column, lower, lower tanpa '_'), ...)
+        self._join_plan_cache = {}  # (base_table, frozenset(tables)) -> [JOIN clause]
+        self._related_cache = {}  # base_table -> {table_name: join_info}
+        self._join_path_cache = {}  # (base_table, target_table) -> ((table, join_info), ...) | None
+        self._bool_column_cache = {}  # table -> (bool_cols, is_cols, is_cols_lower)
+        self._status_column_cache = {}  # (table, status) -> (bool_col, bool_value) | None
 
         self._build_column_map()
         self._build_reverse_relations()
@@ -109,10 +199,24 @@ class QueryParser:
         """
         self.column_map = {}
         self.table_columns = {}
+        self.column_types = {}
+        self._column_lookup = {}
+        self._date_columns = {}
+        self._text_columns = {}
 
         # Auto-map semua kolom dari schema
         for table, info in self.schema_cache.items():
             self.table_columns[table] = [col['name'] for col in info['columns']]
+            # Lookup O(1) untuk cek kolom / tipe: lower(name) -> lower(type), entry pertama menang
+            types = {}
+            lookup = {}
+            for col in info['columns']:
+                types.setdefault(col['name'].lower(), col.get('type', '').lower())
+                lookup.setdefault(col['name'].lower().replace('_', ''), col['name'])
+            self.column_types[table] = types
+            self._column_lookup[table] = lookup
+            self._date_columns[table] = frozenset(c for c, t in types.items() if t in DATE_TYPES)
+            self._text_columns[table] = frozenset(c for c, t in types.items() if t in TEXT_TYPES)
 
             for col in info['columns']:
                 col_name = col['name'].lower()
@@ -127,8 +231,7 @@ class QueryParser:
 
                 # 3. Key with table prefix untuk kolom umum (name, id, etc)
                 #    Contoh: talent.name -> 'talent_name', company.name -> 'company_name'
-                common_cols = ['name', 'id', 'code', 'type', 'status', 'date', 'description', 'title']
-                if col_name in common_cols:
+                if col_name in COMMON_COLUMNS:
                     key_prefixed = f"{table}_{col_name}"
                     self._add_to_map(key_prefixed, col_info, unique=True)
 
@@ -168,10 +271,16 @@ class QueryParser:
     def get_related_tables(self, base_table):
         """
         Get semua tabel yang bisa di-JOIN dari base_table.
+        Di-memoize per tabel (dipanggil berulang dari BFS find_join_path);
+        hasil jangan dimodifikasi.
 
         Returns:
             dict: {table_name: join_info}
         """
+        cached = self._related_cache.get(base_table)
+        if cached is not None:
+            return cached
+
         related = {}
 
         # 1. Tabel yang base_table punya FK ke sana (base -> other)
@@ -195,18 +304,30 @@ class QueryParser:
                         'target_column': rel['from_column']
                     }
 
+        self._related_cache[base_table] = related
         return related
 
     def find_join_path(self, base_table, target_table, visited=None):
         """
         Cari path JOIN dari base_table ke target_table.
         Prioritas: preferred_paths > scored BFS (prioritas relasi yang relevan).
+        Hasil (termasuk None) di-cache per (base_table, target_table).
 
         Returns:
             list: [(table, join_info), ...] atau None jika tidak ada path
         """
-        import heapq
-
+        key = (base_table, target_table)
+        if key in self._join_path_cache:
+            path = self._join_path_cache[key]
+        else:
+            path = self._search_join_path(base_table, target_table)
+            if path is not None:
+                path = tuple(path)
+            self._join_path_cache[key] = path
+        return list(path) if path is not None else None
+
+    def _search_join_path(self, base_table, target_table):
+        """Cari path JOIN (tanpa cache): preferred path, lalu scored BFS"""
         if base_table == target_table:
             return []
 
@@ -218,38 +339,41 @@ class QueryParser:
                 return path
 
         # 2. Scored BFS - prioritaskan relasi yang relevan berdasarkan nama
-        # Heap: (score, counter, current_table, path)
-        # Lower score = better path
-        counter = 0
-        heap = []
-        visited = {base_table}
-
-        related = self.get_related_tables(base_table)
-        for next_table, join_info in related.items():
-            score = self._score_relation(base_table, next_table, join_info)
-            if next_table == target_table:
-                return [(target_table, join_info)]
-            if next_table not in visited:
-                visited.add(next_table)
-                heapq.heappush(heap, (score, counter, next_table, [(next_table, join_info)]))
-                counter += 1
+        # Heap: (score, counter, current_table), lower score = better path.
+        # Path tidak di-copy per push: cukup simpan parent, rekonstruksi saat ketemu target
+        parent = {base_table: None}  # table -> (prev_table, join_info)
+        heap = [(0, 0, base_table)]
+        counter = 1
 
         while heap:
-            current_score, _, current_table, path = heapq.heappop(heap)
+            current_score, _, current_table = heapq.heappop(heap)
 
             related = self.get_related_tables(current_table)
             for next_table, join_info in related.items():
                 if next_table == target_table:
-                    return path + [(target_table, join_info)]
+                    parent[target_table] = (current_table, join_info)
+                    return self._trace_join_path(parent, target_table)
 
-                if next_table not in visited:
-                    visited.add(next_table)
+                if next_table not in parent:
+                    parent[next_table] = (current_table, join_info)
                     new_score = current_score + self._score_relation(current_table, next_table, join_info)
-                    heapq.heappush(heap, (new_score, counter, next_table, path + [(next_table, join_info)]))
+                    heapq.heappush(heap, (new_score, counter, next_table))
                     counter += 1
 
         return None
 
+    @staticmethod
+    def _trace_join_path(parent, target_table):
+        """Rekonstruksi [(table, join_info), ...] dari parent map hasil BFS"""
+        path = []
+        table = target_table
+        while parent[table] is not None:
+            prev_table, join_info = parent[table]
+            path.append((table, join_info))
+            table = prev_table
+        path.reverse()
+        return path
+
     def _score_relation(self, from_table, to_table, join_info):
         """
         Score a relation - lower is better.
@@ -264,8 +388,7 @@ class QueryParser:
         join_type = join_info.get('join_type', '')
 
         # Relasi via file_content, attachment, dll biasanya tidak relevan untuk bisnis
-        irrelevant_tables = {'file_content', 'attachment', 'document_history', 'file_history'}
-        if to_table in irrelevant_tables or from_table in irrelevant_tables:
+        if to_table in IRRELEVANT_TABLES or from_table in IRRELEVANT_TABLES:
             return 10
 
         # Cek apakah kolom FK mengandung nama tabel tujuan
@@ -331,14 +454,11 @@ class QueryParser:
 
         Ini memastikan JOIN path yang paling efisien untuk query bisnis.
         """
-        # Tabel prioritas tinggi untuk base table
-        priority_tables = ['job', 'job_detail', 'job_schedule']
-
         # Kumpulkan semua tabel dari select columns
         tables_in_query = set(c['table'] for c in select_columns)
 
         # Pilih base table berdasarkan prioritas
-        for table in priority_tables:
+        for table in PRIORITY_TABLES:
             if table in tables_in_query:
                 return table
 
@@ -364,12 +484,13 @@ class QueryParser:
             table_hint = parts[0]
             col_name = parts[1]
 
-            # Cari di tabel yang dimaksud
-            for table, cols in self.table_columns.items():
-                if table.lower() == table_hint or table.lower().startswith(table_hint):
-                    for c in cols:
-                        if c.lower() == col_name or c.lower().replace('_', '') == col_name.replace('_', ''):
-                            return {'table': table, 'column': c}
+            # Cari di tabel yang dimaksud (kolom via index, bukan scan per kolom)
+            col_key = col_name.replace('_', '')
+            for table, lookup in self._column_lookup.items():
+                if table.lower().startswith(table_hint):
+                    c = lookup.get(col_key)
+                    if c is not None:
+                        return {'table': table, 'column': c}
 
         # 2. Exact match di column_map
         matches = self._get_matches(col_part)
@@ -405,40 +526,50 @@ class QueryParser:
             return self.column_map[key]
         return []
 
+    def _build_fuzzy_index(self):
+        """Lowercase / strip underscore semua kolom sekali, bukan per fuzzy search"""
+        self._fuzzy_entries = tuple(
+            (table, col, col.lower(), col.lower().replace('_', ''))
+            for table, cols in self.table_columns.items()
+            for col in cols
+        )
+        self._fuzzy_index_built = True
+
     def _fuzzy_search(self, search_term):
         """Fuzzy search untuk kolom dengan caching"""
         # Check cache first
         if search_term in self._fuzzy_cache:
             return self._fuzzy_cache[search_term]
 
+        if not self._fuzzy_index_built:
+            self._build_fuzzy_index()
+
         matches = []
         search_clean = search_term.replace('_', '').replace(' ', '')
 
-        for table, cols in self.table_columns.items():
-            for col in cols:
-                col_lower = col.lower()
-                col_clean = col_lower.replace('_', '')
-
-                # Exact column name match
-                if col_lower == search_term:
-                    matches.append({'table': table, 'column': col, 'score': 100})
-                # Column contains search term
-                elif search_term in col_lower:
-                    matches.append({'table': table, 'column': col, 'score': 80})
-                # Search term contains column
-                elif col_lower in search_term:
-                    matches.append({'table': table, 'column': col, 'score': 70})
-                # Clean match (tanpa underscore)
-                elif col_clean == search_clean:
-                    matches.append({'table': table, 'column': col, 'score': 90})
-                elif search_clean in col_clean:
-                    matches.append({'table': table, 'column': col, 'score': 60})
+        for table, col, col_lower, col_clean in self._fuzzy_entries:
+            # Exact column name match
+            if col_lower == search_term:
+                score = 100
+            # Column contains search term
+            elif search_term in col_lower:
+                score = 80
+            # Search term contains column
+            elif col_lower in search_term:
+                score = 70
+            # Clean match (tanpa underscore)
+            elif col_clean == search_clean:
+                score = 90
+            elif search_clean in col_clean:
+                score = 60
+            else:
+                continue
+            matches.append((score, table, col))
 
-        # Sort by score descending
-        matches.sort(key=lambda x: x.get('score', 0), reverse=True)
+        # Sort by score descending (stable: urutan schema dipertahankan untuk score sama)
+        matches.sort(key=lambda m: m[0], reverse=True)
 
-        # Remove score dan return
-        result = [{'table': m['table'], 'column': m['column']} for m in matches]
+        result = [{'table': table, 'column': col} for _, table, col in matches]
 
         # Cache result (limit cache size to prevent memory bloat)
         if len(self._fuzzy_cache) < 1000:
@@ -460,9 +591,6 @@ class QueryParser:
         if not matches:
             return None
 
-        # Core business tables yang sering digunakan
-        core_tables = {'job', 'job_detail', 'job_schedule', 'talent', 'company', 'payment'}
-
         scored_matches = []
         search_parts = search_term.lower().split('_')
 
@@ -482,7 +610,7 @@ class QueryParser:
                 score += 30
 
             # Core business table bonus
-            if table in core_tables:
+            if table in CORE_TABLES:
                 score += 20
 
             # Table dengan relasi (lebih penting)
@@ -513,63 +641,83 @@ class QueryParser:
 
         return matches
 
+    def _get_boolean_columns(self, table):
+        """
+        Kolom boolean per tabel, di-cache (schema tidak berubah per parser).
+
+        Returns:
+            tuple: (set bool_cols, list is_cols, dict lower(is_col) -> is_col)
+        """
+        cached = self._bool_column_cache.get(table)
+        if cached is None:
+            columns = self.schema_cache.get(table, {}).get('columns', [])
+            bool_cols = [c['name'] for c in columns if c['type'] in ('boolean', 'bool')]
+            is_cols = [c for c in bool_cols if c.lower().startswith('is_')]
+            is_cols_lower = {}
+            for is_col in is_cols:
+                is_cols_lower.setdefault(is_col.lower(), is_col)
+            cached = (set(bool_cols), is_cols, is_cols_lower)
+            self._bool_column_cache[table] = cached
+        return cached
+
     def find_boolean_column_for_status(self, table, status_values):
         """Find boolean column for status values"""
         results = []
-        table_info = self.schema_cache.get(table, {})
-        columns = table_info.get('columns', [])
-
-        bool_cols = [c['name'] for c in columns if c['type'] in ('boolean', 'bool')]
-        is_cols = [c for c in bool_cols if c.lower().startswith('is_')]
 
         for status_val in status_values:
             status_val = status_val.strip().lower()
-            found = False
+            key = (table, status_val)
+            if key in self._status_column_cache:
+                match = self._status_column_cache[key]
+            else:
+                match = self._resolve_status_column(table, status_val)
+                self._status_column_cache[key] = match
+
+            if match is not None:
+                bool_col_name, bool_value = match
+                results.append(({'table': table, 'column': bool_col_name}, bool_value))
+
+        return results if results else None
 
-            # Check in status_mappings
-            if status_val in self.status_mappings:
-                bool_col_name, bool_value = self.status_mappings[status_val]
+    def _resolve_status_column(self, table, status_val):
+        """
+        Resolve 1 status value (lowercase) ke boolean column di table.
+
+        Returns:
+            tuple: (column_name, bool_value) atau None
+        """
+        bool_cols, is_cols, is_cols_lower = self._get_boolean_columns(table)
+
+        # Check in status_mappings
+        if status_val in self.status_mappings:
+            bool_col_name, bool_value = self.status_mappings[status_val]
+            if bool_col_name in bool_cols:
+                return bool_col_name, bool_value
+
+        # Handle "not_xxx" pattern
+        if status_val.startswith('not_'):
+            base_status = status_val[4:]
+            if base_status in self.status_mappings:
+                bool_col_name, _ = self.status_mappings[base_status]
                 if bool_col_name in bool_cols:
-                    results.append(({'table': table, 'column': bool_col_name}, bool_value))
-                    found = True
-                    continue
+                    return bool_col_name, False
 
-            # Handle "not_xxx" pattern
-            if not found and status_val.startswith('not_'):
-                base_status = status_val[4:]
-                if base_status in self.status_mappings:
-                    bool_col_name, _ = self.status_mappings[base_status]
-                    if bool_col_name in bool_cols:
-                        results.append(({'table': table, 'column': bool_col_name}, False))
-                        found = True
-                        continue
-
-                target_col = f'is_{base_status}'
-                for is_col in is_cols:
-                    if is_col.lower() == target_col:
-                        results.append(({'table': table, 'column': is_col}, False))
-                        found = True
-                        break
-
-            # Try is_{status_val}
-            if not found:
-                target_col = f'is_{status_val}'
-                for is_col in is_cols:
-                    if is_col.lower() == target_col:
-                        results.append(({'table': table, 'column': is_col}, True))
-                        found = True
-                        break
-
-            # Partial match
-            if not found:
-                for is_col in is_cols:
-                    col_suffix = is_col.lower().replace('is_', '')
-                    if status_val in col_suffix or col_suffix.startswith(status_val):
-                        results.append(({'table': table, 'column': is_col}, True))
-                        found = True
-                        break
+            is_col = is_cols_lower.get(f'is_{base_status}')
+            if is_col is not None:
+                return is_col, False
 
-        return results if results else None
+        # Try is_{status_val}
+        is_col = is_cols_lower.get(f'is_{status_val}')
+        if is_col is not None:
+            return is_col, True
+
+        # Partial match
+        for is_col in is_cols:
+            col_suffix = is_col.lower().replace('is_', '')
+            if status_val in col_suffix or col_suffix.startswith(status_val):
+                return is_col, True
+
+        return None
 
     def _parse_order_where(self, query_part):
         """
@@ -580,11 +728,15 @@ class QueryParser:
         order_dir = 'ASC'
         conditions_part = None
 
+        # Lowercase sekali, index dari versi lower dipakai untuk slice query_part
+        query_lower = query_part.lower()
+
         # Parse ORDER BY
-        if ' order by ' in query_part.lower():
-            idx = query_part.lower().index(' order by ')
+        idx = query_lower.find(' order by ')
+        if idx != -1:
             order_part = query_part[idx + 10:].strip()
             query_part = query_part[:idx].strip()
+            query_lower = query_lower[:idx].strip()
             order_parts = order_part.split()
             if order_parts:
                 order_by = order_parts[0]
@@ -592,10 +744,9 @@ class QueryParser:
                     order_dir = order_parts[-1].upper()
 
         # Parse WHERE (also support "when" as alias)
-        where_keywords = [' where ', ' when ']
-        for where_kw in where_keywords:
-            if where_kw in query_part.lower():
-                idx = query_part.lower().index(where_kw)
+        for where_kw in WHERE_KEYWORDS:
+            idx = query_lower.find(where_kw)
+            if idx != -1:
                 columns_part = query_part[:idx].strip()
                 conditions_part = query_part[idx + len(where_kw):].strip()
                 return columns_part, conditions_part, order_by, order_dir
@@ -631,7 +782,7 @@ class QueryParser:
             query_part = query_text[8:].strip()
 
             # Cari "show"
-            show_idx = query_part.lower().find(' show ')
+            show_idx = query_lower[8:].strip().find(' show ')
             if show_idx == -1:
                 raise ValueError("Format: primary [kolom] show [kolom1,kolom2] where [kondisi]")
 
@@ -652,12 +803,7 @@ class QueryParser:
             columns_part, conditions_part, order_by, order_dir = self._parse_order_where(query_part)
 
         else:
-            raise ValueError(
-                "Format yang didukung:\n"
-                "1. primary job_number show talent_name,company where status=completed\n"
-                "2. job_number: talent_name,company where status=completed\n"
-                "3. show job_number,talent_name where status=completed"
-            )
+            raise ValueError(SUPPORTED_FORMATS_MESSAGE)
 
         # Resolve primary column -> base table
         base_table = None
@@ -672,9 +818,6 @@ class QueryParser:
             select_columns.append(primary_info)
 
         # Parse SELECT columns (support aggregate functions)
-        # Format: count:kolom, sum:kolom, avg:kolom, min:kolom, max:kolom
-        aggregate_funcs = {'count', 'sum', 'avg', 'min', 'max'}
-
         if columns_part:
             for col_str in columns_part.split(','):
                 col_str = col_str.strip()
@@ -685,7 +828,7 @@ class QueryParser:
                 agg_func = None
                 if ':' in col_str:
                     parts = col_str.split(':', 1)
-                    if parts[0].lower() in aggregate_funcs:
+                    if parts[0].lower() in AGGREGATE_FUNCS:
                         agg_func = parts[0].upper()
                         col_str = parts[1].strip()
 
@@ -723,7 +866,11 @@ class QueryParser:
         where_tables = set()  # Track tables used in WHERE clause
 
         if conditions_part:
-            conditions = re.split(r'\s+and\s+|,', conditions_part, flags=re.IGNORECASE)
+            # Kasus umum 1 kondisi (tanpa ',' / 'and'): tidak perlu regex split
+            if ',' not in conditions_part and 'and' not in conditions_part.lower():
+                conditions = [conditions_part]
+            else:
+                conditions = CONDITION_SPLIT_PATTERN.split(conditions_part)
 
             for cond in conditions:
                 cond = cond.strip()
@@ -804,36 +951,35 @@ class QueryParser:
         # Also supports: schedule_date=2025-01-01..2025-12-31
         if '..' in cond or ' to ' in cond_lower:
             # Parse format: column=start..end or column=start to end
-            for op in ['=']:
-                if op in cond:
-                    parts = cond.split(op, 1)
-                    col_part = parts[0].strip()
-                    range_part = parts[1].strip()
-
-                    # Split by '..' or ' to '
-                    if '..' in range_part:
-                        date_parts = range_part.split('..', 1)
-                    else:
-                        date_parts = re.split(r'\s+to\s+', range_part, flags=re.IGNORECASE)
-
-                    if len(date_parts) == 2:
-                        start_date = parse_date(date_parts[0].strip().strip("'\""))
-                        end_date = parse_date(date_parts[1].strip().strip("'\""))
-
-                        col_info = self.find_column(col_part, prefer_table=base_table)
-                        if col_info:
-                            where_parts.append(f'"{col_info["table"]}"."{col_info["column"]}"::date BETWEEN %s::date AND %s::date')
-                            params.append(start_date)
-                            params.append(end_date)
-                            where_tables.add(col_info['table'])  # Track table
-                            return
+            if '=' in cond:
+                parts = cond.split('=', 1)
+                col_part = parts[0].strip()
+                range_part = parts[1].strip()
+
+                # Split by '..' or ' to '
+                if '..' in range_part:
+                    date_parts = range_part.split('..', 1)
+                else:
+                    date_parts = DATE_RANGE_TO_PATTERN.split(range_part)
+
+                if len(date_parts) == 2:
+                    start_date = parse_date(date_parts[0].strip().strip("'\""))
+                    end_date = parse_date(date_parts[1].strip().strip("'\""))
+
+                    col_info = self.find_column(col_part, prefer_table=base_table)
+                    if col_info:
+                        where_parts.append(f'{column_ref(col_info["table"], col_info["column"])}::date BETWEEN %s::date AND %s::date')
+                        params.append(start_date)
+                        params.append(end_date)
+                        where_tables.add(col_info['table'])  # Track table
+                        return
 
         # IS NOT NULL
         if ' is not null' in cond_lower:
             col_part = cond[:cond_lower.index(' is not null')].strip()
             col_info = self.find_column(col_part, prefer_table=base_table)
             if col_info:
-                where_parts.append(f'"{col_info["table"]}"."{col_info["column"]}" IS NOT NULL')
+                where_parts.append(f'{column_ref(col_info["table"], col_info["column"])} IS NOT NULL')
                 where_tables.add(col_info['table'])  # Track table
             return
 
@@ -842,18 +988,17 @@ class QueryParser:
             col_part = cond[:cond_lower.index(' is null')].strip()
             col_info = self.find_column(col_part, prefer_table=base_table)
             if col_info:
-                where_parts.append(f'"{col_info["table"]}"."{col_info["column"]}" IS NULL')
+                where_parts.append(f'{column_ref(col_info["table"], col_info["column"])} IS NULL')
                 where_tables.add(col_info['table'])  # Track table
             return
 
-        # Parse with operators
-        for op in ['>=', '<=', '!=', '<>', '>', '<', '=']:
-            if op in cond:
-                parts = cond.split(op, 1)
-                col_part = parts[0].strip()
-                val_part = parts[1].strip().strip("'\"")
-                self._add_condition(col_part, val_part, op, base_table, where_parts, params, where_tables)
-                return
+        # Parse with operators: 1 scan, operator paling kiri (2 karakter didahulukan)
+        match = CONDITION_OPERATOR_PATTERN.search(cond)
+        if match:
+            col_part = cond[:match.start()].strip()
+            val_part = cond[match.end():].strip().strip("'\"")
+            self._add_condition(col_part, val_part, match.group(), base_table, where_parts, params, where_tables)
+            return
 
         # Space-separated
         parts = cond.split(None, 1)
@@ -870,20 +1015,23 @@ class QueryParser:
 
         # Parse multiple values
         if '/' in val_part or '|' in val_part:
-            values = re.split(r'[/|]', val_part)
+            values = VALUE_SPLIT_PATTERN.split(val_part)
             values = [v.strip().lower() for v in values if v.strip()]
         else:
             values = [val_part.lower()]
 
         # Check if status condition
-        is_status_condition = any(kw in col_part_lower for kw in self.status_keywords)
+        is_status_condition = (
+            self._status_keyword_re is not None
+            and self._status_keyword_re.search(col_part_lower) is not None
+        )
 
         if is_status_condition and base_table:
             bool_results = self.find_boolean_column_for_status(base_table, values)
             if bool_results:
                 or_conditions = []
                 for col_info, bool_value in bool_results:
-                    or_conditions.append(f'"{col_info["table"]}"."{col_info["column"]}" = %s')
+                    or_conditions.append(f'{column_ref(col_info["table"], col_info["column"])} = %s')
                     params.append(bool_value)
                     where_tables.add(col_info['table'])  # Track table
 
@@ -899,17 +1047,13 @@ class QueryParser:
         col_info = self.find_column(col_part, prefer_table=base_table)
         if col_info:
             where_tables.add(col_info['table'])  # Track table
-            col_ref = f'"{col_info["table"]}"."{col_info["column"]}"'
+            col_ref = column_ref(col_info["table"], col_info["column"])
             col_name = col_info['column'].lower()
 
-            # Get column type from schema
-            col_type = self._get_column_type(col_info['table'], col_info['column'])
-
             # Handle date/timestamp columns with status-like values
             # e.g., completed_on=completed -> is_completed=TRUE or completed_on IS NOT NULL
-            if col_type in ('timestamp', 'timestamptz', 'date', 'timestamp with time zone', 'timestamp without time zone'):
-                status_values = {'completed', 'done', 'finished', 'yes', 'true', 'ada'}
-                if len(values) == 1 and values[0] in status_values:
+            if col_name in self._date_columns.get(col_info['table'], ()):
+                if len(values) == 1 and values[0] in DONE_VALUES:
                     # Check if there's a corresponding boolean column
                     # e.g., completed_on -> is_completed
                     base_col_name = col_name.replace('_on', '').replace('_date', '').replace('_at', '')
@@ -917,7 +1061,7 @@ class QueryParser:
 
                     for bool_col in bool_col_candidates:
                         if self._column_exists(col_info['table'], bool_col):
-                            where_parts.append(f'"{col_info["table"]}"."{bool_col}" = %s')
+                            where_parts.append(f'{column_ref(col_info["table"], bool_col)} = %s')
                             params.append(True)
                             return
 
@@ -926,13 +1070,12 @@ class QueryParser:
                     return
 
                 # Handle "not completed", "none", "empty" etc.
-                empty_values = {'none', 'null', 'empty', 'kosong', 'belum', 'no', 'false', 'tidak'}
-                if len(values) == 1 and values[0] in empty_values:
+                if len(values) == 1 and values[0] in EMPTY_VALUES:
                     where_parts.append(f'{col_ref} IS NULL')
                     return
 
             # Handle string columns with ILIKE for partial matching
-            if col_type in ('text', 'varchar', 'character varying', 'char', 'character', 'name'):
+            if col_name in self._text_columns.get(col_info['table'], ()):
                 if len(values) > 1:
                     # Multiple values: use OR with ILIKE
                     or_conditions = []
@@ -955,23 +1098,9 @@ class QueryParser:
                 where_parts.append(f'{col_ref} {op} %s')
                 params.append(values[0])
 
-    def _get_column_type(self, table, column):
-        """Get column type from schema cache"""
-        table_info = self.schema_cache.get(table, {})
-        columns = table_info.get('columns', [])
-        for col in columns:
-            if col['name'].lower() == column.lower():
-                return col.get('type', '').lower()
-        return ''
-
     def _column_exists(self, table, column):
         """Check if column exists in table"""
-        table_info = self.schema_cache.get(table, {})
-        columns = table_info.get('columns', [])
-        for col in columns:
-            if col['name'].lower() == column.lower():
-                return True
-        return False
+        return column.lower() in self.column_types.get(table, {})
 
     def _build_column_alias(self, table, column, used_aliases=None, user_input=None):
         """
@@ -987,9 +1116,7 @@ class QueryParser:
         table_lower = table.lower()
 
         # Common columns that ALWAYS need table prefix to avoid ambiguity
-        always_prefix_cols = {'name', 'id', 'code', 'type', 'status', 'description', 'title', 'date'}
-
-        if col_lower in always_prefix_cols:
+        if col_lower in COMMON_COLUMNS:
             alias = f"{table_lower} {col_lower}"
         elif col_lower.startswith(table_lower):
             # Column already includes table name (e.g., job_number -> "job number")
@@ -1003,8 +1130,12 @@ class QueryParser:
 
         return alias
 
-    def build_sql(self, parsed, limit=1000, apply_default_filters=True):
-        """Build SQL query from parsed components"""
+    def build_sql(self, parsed, limit=1000, apply_default_filters=True, extra_where=None, extra_params=()):
+        """
+        Build SQL query from parsed components.
+        extra_where/extra_params: kondisi tambahan (mis. filter GUI) yang di-AND ke WHERE,
+        param-nya ditempatkan sebelum param LIMIT.
+        """
         select_columns = parsed['select_columns']
         base_table = parsed['base_table']
         where_parts = list(parsed['where_parts'])  # Copy to avoid modifying original
@@ -1026,7 +1157,7 @@ class QueryParser:
         used_aliases = set()  # Track used aliases to avoid duplicates
 
         for c in select_columns:
-            col_ref = f'"{c["table"]}"."{c["column"]}"'
+            col_ref = column_ref(c["table"], c["column"])
             # Build readable alias: table_column or just column for common patterns
             alias = self._build_column_alias(c['table'], c['column'], used_aliases)
             used_aliases.add(alias)
@@ -1035,21 +1166,23 @@ class QueryParser:
                 # Aggregate function: COUNT, SUM, AVG, MIN, MAX
                 agg = c['aggregate']
                 agg_alias = f"{agg.lower()}_{alias}"
-                select_parts.append(f'{agg}({col_ref}) AS "{agg_alias}"')
+                select_parts.append(f'{agg}({col_ref}) AS {quote_identifier(agg_alias)}')
             else:
-                select_parts.append(f'{col_ref} AS "{alias}"')
+                select_parts.append(f'{col_ref} AS {quote_identifier(alias)}')
                 if has_aggregate:
                     # Non-aggregate columns need GROUP BY
                     group_by_cols.append(col_ref)
 
-        sql = f'SELECT {", ".join(select_parts)}\nFROM "{base_table}"'
+        # SQL dirakit per baris, di-join sekali di akhir
+        sql_lines = [
+            f'SELECT {", ".join(select_parts)}',
+            f'FROM {quote_identifier(base_table)}',
+        ]
 
         # JOINs - include both SELECT and WHERE tables
         tables_needed = set(c['table'] for c in select_columns)
         tables_needed.update(where_tables)  # Add tables from WHERE clause
-        join_clauses = self._build_joins(base_table, tables_needed)
-        if join_clauses:
-            sql += '\n' + '\n'.join(join_clauses)
+        sql_lines.extend(self._build_joins(base_table, tables_needed))
 
         # Apply default filters for all joined tables
         applied_default_filters = []
@@ -1059,21 +1192,29 @@ class QueryParser:
             where_parts.extend(default_where)
             params.extend(default_params)
 
+        # Kondisi tambahan dari caller, setelah default filters (urutan param = urutan di SQL)
+        if extra_where:
+            where_parts.append(f'({extra_where})')
+            params.extend(extra_params)
+
         # WHERE
         if where_parts:
-            sql += f'\nWHERE {" AND ".join(where_parts)}'
+            sql_lines.append(f'WHERE {" AND ".join(where_parts)}')
 
         # GROUP BY (for aggregate queries)
         if group_by_cols:
-            sql += f'\nGROUP BY {", ".join(group_by_cols)}'
+            sql_lines.append(f'GROUP BY {", ".join(group_by_cols)}')
 
         # ORDER BY
         if order_by:
             col_info = self.find_column(order_by, prefer_table=base_table)
             if col_info:
-                sql += f'\nORDER BY "{col_info["table"]}"."{col_info["column"]}" {order_dir}'
+                sql_lines.append(f'ORDER BY {column_ref(col_info["table"], col_info["column"])} {order_dir}')
 
-        sql += f'\nLIMIT {limit}'
+        # LIMIT sebagai parameter (selalu param terakhir): teks query sama untuk limit berapa pun
+        sql_lines.append('LIMIT %s')
+        params.append(int(limit))
+        sql = '\n'.join(sql_lines)
 
         # Return sql, params, dan info filter yang diterapkan
         return sql, params, applied_default_filters
@@ -1094,7 +1235,7 @@ class QueryParser:
         existing_filters = set()
         for part in existing_where_parts:
             # Extract table.column from WHERE part like '"table"."column"'
-            matches = re.findall(r'"(\w+)"."(\w+)"', part)
+            matches = QUOTED_COLUMN_PATTERN.findall(part)
             for table, col in matches:
                 existing_filters.add(f'{table}.{col}')
 
@@ -1113,12 +1254,25 @@ class QueryParser:
                 op = flt.get('op', '=')
                 value = flt['value']
 
-                where_parts.append(f'"{table}"."{col}" {op} %s')
-                params.append(value)
+                if op.upper() in ('IN', 'NOT IN') and isinstance(value, (list, tuple)) and not value:
+                    # List kosong: 'IN ()' bukan SQL valid -> IN selalu false, NOT IN selalu true
+                    where_parts.append('FALSE' if op.upper() == 'IN' else 'TRUE')
+                    description = f"{table}.{col} {op} ()"
+                elif op.upper() in ('IN', 'NOT IN') and isinstance(value, (list, tuple)):
+                    # 1 placeholder per nilai (list mentah di-adapt psycopg2 jadi ARRAY, bukan IN-list)
+                    placeholders = ', '.join(['%s'] * len(value))
+                    where_parts.append(f'{column_ref(table, col)} {op} ({placeholders})')
+                    params.extend(value)
+                    # Join hanya untuk tampilan
+                    description = f"{table}.{col} {op} ({', '.join(map(str, value))})"
+                else:
+                    where_parts.append(f'{column_ref(table, col)} {op} %s')
+                    params.append(value)
+                    description = f"{table}.{col}{op}{value}"
                 existing_filters.add(key)  # Mark as filtered
 
                 # Track applied filter for reporting
-                applied_filters.append(f"{table}.{col}{op}{value}")
+                applied_filters.append(description)
 
         return where_parts, params, applied_filters
 
@@ -1126,7 +1280,13 @@ class QueryParser:
         """
         Build JOIN clauses menggunakan path finding.
         Mendukung multi-level joins (A -> B -> C).
+        Hasil di-cache per (base_table, set tabel) - schema/relasi tidak berubah per parser.
         """
+        key = (base_table, frozenset(tables_needed))
+        cached = self._join_plan_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
         join_clauses = []
         joined = {base_table}
         remaining = tables_needed - joined
@@ -1135,7 +1295,8 @@ class QueryParser:
             if target_table in joined:
                 continue
 
-            # Cari path dari base_table ke target_table
+            # Cari path dari base_table ke target_table. Relasi langsung selalu ketemu
+            # di langkah pertama BFS, jadi tanpa path berarti memang tidak bisa di-JOIN
             path = self.find_join_path(base_table, target_table)
 
             if path:
@@ -1146,35 +1307,15 @@ class QueryParser:
                         if join_info['join_type'] == 'outgoing':
                             # current punya FK ke next_table
                             join_clauses.append(
-                                f'LEFT JOIN "{next_table}" ON "{current}"."{join_info["base_column"]}" = "{next_table}"."{join_info["target_column"]}"'
+                                f'LEFT JOIN {quote_identifier(next_table)} ON {column_ref(current, join_info["base_column"])} = {column_ref(next_table, join_info["target_column"])}'
                             )
                         else:
                             # next_table punya FK ke current
                             join_clauses.append(
-                                f'LEFT JOIN "{next_table}" ON "{next_table}"."{join_info["target_column"]}" = "{current}"."{join_info["base_column"]}"'
+                                f'LEFT JOIN {quote_identifier(next_table)} ON {column_ref(next_table, join_info["target_column"])} = {column_ref(current, join_info["base_column"])}'
                             )
                         joined.add(next_table)
                     current = next_table
-            else:
-                # Fallback: coba direct relation
-                # Check if base_table has FK to target
-                if base_table in self.relations_cache:
-                    for rel in self.relations_cache[base_table]:
-                        if rel['to_table'] == target_table:
-                            join_clauses.append(
-                                f'LEFT JOIN "{target_table}" ON "{base_table}"."{rel["from_column"]}" = "{target_table}"."{rel["to_column"]}"'
-                            )
-                            joined.add(target_table)
-                            break
-
-                # Check if target has FK to base_table
-                if target_table not in joined and target_table in self.relations_cache:
-                    for rel in self.relations_cache[target_table]:
-                        if rel['to_table'] == base_table:
-                            join_clauses.append(
-                                f'LEFT JOIN "{target_table}" ON "{target_table}"."{rel["from_column"]}" = "{base_table}"."{rel["to_column"]}"'
-                            )
-                            joined.add(target_table)
-                            break
 
+        self._join_plan_cache[key] = tuple(join_clauses)
         return join_clauses
@@ -22,7 +22,7 @@ os.chdir(ROOT_DIR)
 
 def check_dependencies():
     """Check if required packages are installed"""
-    required = ['PyInstaller', 'psycopg2', 'pandas', 'openpyxl']
+    required = ['PyInstaller', 'psycopg2', 'pandas', 'openpyxl', 'xlsxwriter']
     missing = []
 
     for pkg in required:
@@ -60,6 +60,7 @@ a = Analysis(
         'psycopg2',
         'pandas',
         'openpyxl',
+        'xlsxwriter',
         'tkinter',
         'tkinter.ttk',
         'tkinter.messagebox',
@@ -153,6 +154,7 @@ def build_executable():
         'pandas',
         'openpyxl',
         'openpyxl.cell._writer',
+        'xlsxwriter',
         'src.app',
         'src.config',
         'src.database',